@@ -1,4 +1,10 @@
 import asyncio
+import os
+
+if os.getenv('ACTOR_PROFILE_STARTUP'):
+    # Install before anything else is imported so the profile covers the whole startup.
+    from .profiling import startup_profiler
+    startup_profiler.install()
 
 from .main import main
 
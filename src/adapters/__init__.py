@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from src.adapters.base import CodeSection, SiteAdapter, task_keywords
+from src.adapters.platforms import ECode360Adapter, MunicodeAdapter, UpCodesAdapter
+
+ADAPTERS: List[SiteAdapter] = [
+    MunicodeAdapter(),
+    UpCodesAdapter(),
+    ECode360Adapter(),
+]
+
+
+def get_site_adapter(url: str) -> Optional[SiteAdapter]:
+    """Return the adapter for the platform hosting `url`, if it is a known one."""
+    for adapter in ADAPTERS:
+        if adapter.handles(url):
+            return adapter
+    return None
+
+
+__all__ = [
+    'ADAPTERS',
+    'CodeSection',
+    'ECode360Adapter',
+    'MunicodeAdapter',
+    'SiteAdapter',
+    'UpCodesAdapter',
+    'get_site_adapter',
+    'task_keywords',
+]
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Set, Tuple
+from urllib.parse import quote_plus, urldefrag
+
+from apify import Actor
+
+# Words that say nothing about which section is relevant.
+_GENERIC_WORDS = {
+    "the", "and", "for", "with", "find", "what", "are", "new", "need", "needs", "requirement", "requirements",
+    "building", "code", "codes", "rule", "rules", "regulation", "regulations", "zoning", "city", "county", "state",
+    "from", "into", "about", "how", "which", "does", "should", "must", "can", "my", "our", "build", "built",
+}
+
+
+def task_keywords(user_task: str) -> List[str]:
+    """
+    Topic keywords of a task, in order, e.g. "Find stair requirements for a new house in Los Angeles"
+    -> ["stair", "house"]. The location after the last " in " is dropped, the site already scopes it.
+    """
+    topic = re.split(r"\s+in\s+", user_task, flags=re.IGNORECASE)
+    if len(topic) > 1:
+        topic = topic[:-1]
+    words = re.findall(r"[a-z]+", " ".join(topic).lower())
+    seen: List[str] = []
+    for word in words:
+        if len(word) > 2 and word not in _GENERIC_WORDS and word not in seen:
+            seen.append(word)
+    return seen
+
+
+def _stem_set(text: str) -> Set[str]:
+    return {w[:-1] if w.endswith("s") and len(w) > 3 else w for w in re.findall(r"[a-z]+", text.lower())}
+
+
+@dataclass
+class CodeSection:
+    title: str
+    url: str
+
+    def score(self, keywords: List[str]) -> int:
+        """Number of task keywords present in the title."""
+        title_words = _stem_set(self.title)
+        return sum(1 for k in _stem_set(" ".join(keywords)) if k in title_words)
+
+
+class SiteAdapter:
+    """
+    Deterministic navigation for one code-hosting platform.
+
+    Subclasses describe the platform: its domains, the URL shapes of table-of-contents and section links,
+    how to build a search URL, and where the section body lives in the DOM. The base class turns that
+    into "list chapters / search sections / fetch section" operations on a Playwright page, so the agent
+    only needs the LLM loop for unknown sites.
+    """
+    name: str = ""
+    domains: Tuple[str, ...] = ()
+    # hrefs of table-of-contents (chapter/article) links
+    chapter_link_re: Optional[Pattern] = None
+    # hrefs of section links, on search result and chapter pages
+    section_link_re: Optional[Pattern] = None
+    # element holding the code text on a section page
+    content_selector: str = "main"
+    # element that signals client-side rendering is done
+    ready_selector: Optional[str] = None
+
+    def handles(self, url: str) -> bool:
+        host = re.sub(r"^https?://", "", url).split("/", 1)[0].lower()
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    def search_url(self, current_url: str, query: str) -> Optional[str]:
+        """URL of the platform's search results for `query`, scoped to the code at `current_url`."""
+        return None
+
+    async def _goto(self, page, url: str) -> bool:
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            if self.ready_selector:
+                await page.wait_for_selector(self.ready_selector, timeout=10000)
+            return True
+        except Exception as e:
+            Actor.log.warning(f"[{self.name}] Failed to load {url}: {e}")
+            return False
+
+    async def _links(self, page, pattern: Optional[Pattern]) -> List[CodeSection]:
+        if pattern is None:
+            return []
+        raw = await page.eval_on_selector_all(
+            "a[href]", "els => els.map(e => [e.href, (e.innerText || e.textContent || '').trim()])"
+        )
+        sections: List[CodeSection] = []
+        seen = set()
+        for href, text in raw:
+            href = urldefrag(href)[0]
+            if text and pattern.search(href) and href not in seen:
+                seen.add(href)
+                sections.append(CodeSection(title=" ".join(text.split()), url=href))
+        return sections
+
+    async def list_chapters(self, page, code_url: str) -> List[CodeSection]:
+        """Table-of-contents entries of the code at `code_url`."""
+        if page.url != code_url and not await self._goto(page, code_url):
+            return []
+        return await self._links(page, self.chapter_link_re)
+
+    async def search_sections(self, page, code_url: str, query: str) -> List[CodeSection]:
+        """Sections matching `query`, using the platform's own search."""
+        url = self.search_url(code_url, query)
+        if not url or not await self._goto(page, url):
+            return []
+        return await self._links(page, self.section_link_re)
+
+    async def fetch_section(self, page, section_url: str) -> str:
+        """HTML of the section body (the whole page if the content element is missing)."""
+        if not await self._goto(page, section_url):
+            return ""
+        element = await page.query_selector(self.content_selector)
+        if element:
+            return await element.inner_html()
+        return await page.content()
+
+
+def build_search_url(base: str, query: str, param: str = "q") -> str:
+    separator = "&" if "?" in base else "?"
+    return f"{base}{separator}{param}={quote_plus(query)}"
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from src.adapters.base import SiteAdapter, build_search_url
+
+
+class MunicodeAdapter(SiteAdapter):
+    """
+    Municode Library, e.g. https://library.municode.com/ca/antioch/codes/code_of_ordinances?nodeId=TIT9PLZO
+    Codes live under /{state}/{city}/codes/{code}; every TOC node and section is a `nodeId` query parameter.
+    """
+    name = "Municode"
+    domains = ("library.municode.com", "municode.com")
+    chapter_link_re = re.compile(r"/codes/[^/?]+\?nodeId=[A-Z0-9_]+$")
+    section_link_re = re.compile(r"/codes/[^/?]+\?nodeId=[A-Za-z0-9_.]+")
+    content_selector = "#codesContent, .chunk-content-wrapper, mcc-codes-content"
+    ready_selector = "a[href*='nodeId=']"
+
+    _CLIENT_RE = re.compile(r"(https?://library\.municode\.com/[a-z]{2}/[^/?#]+)")
+
+    def search_url(self, current_url: str, query: str) -> Optional[str]:
+        match = self._CLIENT_RE.match(current_url)
+        if not match:
+            return None
+        return build_search_url(f"{match.group(1)}/search", query, param="searchText")
+
+
+class UpCodesAdapter(SiteAdapter):
+    """
+    UpCodes, e.g. https://up.codes/viewer/california/ca-building-code-2022/chapter/10/means-of-egress
+    Chapters are /viewer/{jurisdiction}/{code}/chapter/{n}/{slug}; sections are fragments on chapter pages.
+    """
+    name = "UpCodes"
+    domains = ("up.codes",)
+    chapter_link_re = re.compile(r"/viewer/[^/]+/[^/]+/chapter/[^/]+")
+    section_link_re = re.compile(r"/viewer/[^/]+/[^/]+/chapter/[^/]+")
+    content_selector = "#code-content, .code-content, article"
+
+    _CODE_RE = re.compile(r"(https?://up\.codes/viewer/[^/]+/[^/?#]+)")
+
+    def search_url(self, current_url: str, query: str) -> Optional[str]:
+        match = self._CODE_RE.match(current_url)
+        if not match:
+            return build_search_url("https://up.codes/search", query)
+        return build_search_url(f"{match.group(1)}/search", query)
+
+    async def list_chapters(self, page, code_url: str):
+        match = self._CODE_RE.match(code_url)
+        # The code's landing page carries the full chapter list, chapter pages only their own sections.
+        return await super().list_chapters(page, match.group(1) if match else code_url)
+
+
+class ECode360Adapter(SiteAdapter):
+    """
+    eCode360 (General Code), e.g. https://ecode360.com/AN1234 for a municipality's code,
+    and numeric IDs (https://ecode360.com/12345678) for chapters, articles and sections alike.
+    """
+    name = "eCode360"
+    domains = ("ecode360.com",)
+    chapter_link_re = re.compile(r"ecode360\.com/\d+$")
+    section_link_re = re.compile(r"ecode360\.com/\d+$")
+    content_selector = "#codeContent, #content"
+
+    _CUSTOMER_RE = re.compile(r"https?://ecode360\.com/([A-Z]{2}\d{3,5})")
+
+    def search_url(self, current_url: str, query: str) -> Optional[str]:
+        match = self._CUSTOMER_RE.match(current_url)
+        if not match:
+            return None
+        return build_search_url(f"https://ecode360.com/{match.group(1)}/search", query, param="query")
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+from apify import Actor
+
+# Key-value store records holding checkpoints start with this prefix.
+CHECKPOINT_PREFIX = "CHECKPOINT"
+
+
+def checkpoint_key(kind: str, *parts: str) -> str:
+    """Key-value store key for a checkpoint of `kind`, unique for the given parts (task, URL, ...)."""
+    digest = hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+    return f"{CHECKPOINT_PREFIX}_{kind}_{digest}"
+
+
+class CheckpointStore:
+    """
+    Checkpoints in the run's default key-value store.
+
+    The default store survives migrations and restarts of the same run, so work checkpointed here is
+    picked up again instead of being redone. Failures to read or write are logged and otherwise ignored:
+    a checkpoint is an optimisation, never a reason to fail the run.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self._store = None
+
+    async def _open(self):
+        if self._store is None:
+            self._store = await Actor.open_key_value_store()
+        return self._store
+
+    async def load(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            return await (await self._open()).get_value(key)
+        except Exception as e:
+            Actor.log.warning(f"Failed to load checkpoint {key}: {e}")
+            return None
+
+    async def save(self, key: str, data: Any) -> None:
+        if not self.enabled:
+            return
+        try:
+            await (await self._open()).set_value(key, data)
+        except Exception as e:
+            Actor.log.warning(f"Failed to save checkpoint {key}: {e}")
+
+
+checkpoints = CheckpointStore()
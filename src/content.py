@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import zlib
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.dedup import deduplicate_sources
+
+# Max bytes of extracted text kept per page.
+PAGE_TEXT_LIMIT = 200_000
+# Max bytes of extracted text kept per research run, across all tabs.
+RUN_TEXT_LIMIT = 600_000
+# Compressed bodies larger than this are written to disk instead of being kept in memory.
+SPILL_THRESHOLD = 32_000
+# HTML is fed to the extractor in chunks of this many characters.
+FEED_CHUNK_CHARS = 64_000
+
+_SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "head"}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "br", "tr", "table", "ul", "ol", "dl", "dt", "dd",
+    "blockquote", "pre", "header", "footer", "nav", "aside", "main", "form",
+}
+_HEADING_TAGS = {"h1": "# ", "h2": "## ", "h3": "### ", "h4": "#### ", "h5": "##### ", "h6": "###### "}
+
+
+class TextExtractor(HTMLParser):
+    """
+    Streaming HTML -> Markdown-ish text extractor.
+    Drops scripts/styles, keeps headings and list items, and stops collecting once `limit` bytes are reached.
+    """
+
+    def __init__(self, limit: int = PAGE_TEXT_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.size = 0
+        self.truncated = False
+        self._parts: List[str] = []
+        self._skip_depth = 0
+
+    def _emit(self, text: str) -> None:
+        if self.truncated:
+            return
+        encoded = len(text.encode("utf-8"))
+        if self.size + encoded > self.limit:
+            remaining = self.limit - self.size
+            text = text.encode("utf-8")[:remaining].decode("utf-8", errors="ignore")
+            encoded = len(text.encode("utf-8"))
+            self.truncated = True
+        self._parts.append(text)
+        self.size += encoded
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _HEADING_TAGS:
+            self._emit("\n\n" + _HEADING_TAGS[tag])
+        elif tag == "li":
+            self._emit("\n- ")
+        elif tag in _BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _HEADING_TAGS or tag in _BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        text = " ".join(data.split())
+        if text:
+            self._emit(text + " ")
+
+    def text(self) -> str:
+        # Block boundaries are kept as single blank lines, so headingless pages still split into paragraphs
+        # (see `split_sections`).
+        lines: List[str] = []
+        for line in "".join(self._parts).splitlines():
+            line = line.strip()
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        text = "\n".join(lines).strip()
+        return text + "\n[content truncated]" if self.truncated else text
+
+
+def extract_text(html: str, limit: int = PAGE_TEXT_LIMIT) -> Tuple[str, bool]:
+    """
+    Extract readable text from `html`, feeding it in chunks and stopping early once `limit` is hit.
+    Returns the text and whether it was truncated.
+    """
+    parser = TextExtractor(limit)
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[start:start + FEED_CHUNK_CHARS])
+        if parser.truncated:
+            break
+    else:
+        parser.close()
+    return parser.text(), parser.truncated
+
+
+@dataclass
+class PageContent:
+    """
+    Bounded, compressed text extracted from one page.
+    The body lives either in memory (`compressed`) or on disk (`path`); call `text()` to read it back.
+    """
+    content_id: str
+    url: str
+    size: int                         # bytes of uncompressed text
+    truncated: bool
+    compressed: Optional[bytes] = None
+    path: Optional[str] = None
+
+    def text(self) -> str:
+        if self.compressed is not None:
+            data = self.compressed
+        else:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        return zlib.decompress(data).decode("utf-8")
+
+
+class ContentStore:
+    """
+    Holds the page contents extracted during one research run.
+    Enforces the per-page and per-run byte caps and spills large bodies to a temporary directory,
+    so tabs only pass small `PageContent` references around.
+    """
+
+    def __init__(
+        self,
+        page_limit: int = PAGE_TEXT_LIMIT,
+        run_limit: int = RUN_TEXT_LIMIT,
+        spill_threshold: int = SPILL_THRESHOLD,
+    ):
+        self.page_limit = page_limit
+        self.run_limit = run_limit
+        self.spill_threshold = spill_threshold
+        self.used = 0
+        self._items: Dict[str, PageContent] = {}
+        self._spill_dir: Optional[str] = None
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.run_limit - self.used)
+
+    def add(self, url: str, html: str) -> Optional[PageContent]:
+        """Extract, cap and store the content of a page. Returns `None` once the run budget is used up."""
+        limit = min(self.page_limit, self.remaining)
+        if limit <= 0:
+            return None
+        text, truncated = extract_text(html, limit)
+        return self.add_text(url, text, truncated)
+
+    def add_text(self, url: str, text: str, truncated: bool = False) -> Optional[PageContent]:
+        """Store already extracted text, subject to the same caps as `add`."""
+        data = text.encode("utf-8")
+        limit = min(self.page_limit, self.remaining)
+        if limit <= 0 or not data:
+            return None
+        if len(data) > limit:
+            # Cut at a character boundary, like `TextExtractor._emit`
+            data = data[:limit].decode("utf-8", errors="ignore").encode("utf-8")
+            truncated = True
+            if not data:
+                return None
+        content_id = hashlib.sha1(url.encode("utf-8") + b"\0" + data).hexdigest()[:16]
+        if content_id in self._items:
+            return self._items[content_id]
+
+        compressed = zlib.compress(data, 6)
+        item = PageContent(content_id=content_id, url=url, size=len(data), truncated=truncated)
+        if len(compressed) > self.spill_threshold:
+            item.path = self._spill(content_id, compressed)
+        else:
+            item.compressed = compressed
+
+        self.used += item.size
+        self._items[content_id] = item
+        return item
+
+    def get(self, content_id: str) -> Optional[PageContent]:
+        return self._items.get(content_id)
+
+    def _spill(self, content_id: str, compressed: bytes) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="page-content-")
+        path = os.path.join(self._spill_dir, f"{content_id}.zlib")
+        with open(path, "wb") as f:
+            f.write(compressed)
+        return path
+
+    def render(self, contents: Iterable[PageContent], max_chars: int) -> str:
+        """
+        Concatenate contents into the `--- START SOURCE ---` format expected by the summarizer,
+        dropping sections duplicated across sources and splitting `max_chars` evenly across sources
+        so one long page does not crowd out the others.
+        """
+        # Only the head of each source can make it into the output, so deduplicate just that.
+        sources = deduplicate_sources([(item.url, item.text()[:max_chars]) for item in contents])
+        if not sources:
+            return ""
+        share = max_chars // len(sources)
+        blocks = []
+        for url, text in sources:
+            blocks.append(f"--- START SOURCE: {url} ---\n{text[:share]}\n--- END SOURCE ---\n")
+        return "\n\n".join(blocks)
+
+    def close(self) -> None:
+        """Release all stored bodies and remove spilled files."""
+        self._items.clear()
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
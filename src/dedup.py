@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from apify import Actor
+
+from src.models import BuildingCodeRequirement
+
+# Words per shingle.
+SHINGLE_SIZE = 5
+# MinHash signature length, split into LSH bands of BAND_ROWS rows.
+NUM_PERM = 64
+BAND_ROWS = 4
+# Estimated Jaccard similarity from which two sections count as the same text.
+DUPLICATE_THRESHOLD = 0.8
+# Sections shorter than this many words are never treated as duplicates (headings, short notes).
+MIN_SECTION_WORDS = 20
+# Word-set Jaccard similarity from which two requirements citing the same section say the same thing.
+REQUIREMENT_DUPLICATE_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Spelled-out code names -> the abbreviation used in references.
+CODE_ALIASES: List[Tuple[str, str]] = [
+    ("california building code", "cbc"),
+    ("california residential code", "crc"),
+    ("california fire code", "cfc"),
+    ("international building code", "ibc"),
+    ("international residential code", "irc"),
+    ("international fire code", "ifc"),
+    ("national construction code", "ncc"),
+    ("building code of australia", "bca"),
+    ("municipal code", "mc"),
+]
+_REFERENCE_NOISE_RE = re.compile(
+    r"§|\b(?:section|sec|subsection|clause|article|art|edition|ed|code|no|vol|volume)\b\.?"
+)
+# A year-like number standing on its own ("CBC 2022"), not part of a section number ("1905.1", "20-3").
+_YEAR_RE = re.compile(r"(?<![\w.\-])(?:19|20)\d{2}(?![\w\-]|\.\d)")
+# Words after which a year-like number is a section or chapter ("Section 2003").
+_SECTION_WORD_RE = re.compile(r"(?:§|\b(?:section|sec|subsection|clause|article|art|chapter|ch))\W*$")
+# Chapters are kept apart from sections: "Chapter 10" is not "Section 10".
+_CHAPTER_RE = re.compile(r"\b(?:chapter|ch)\b\.?")
+_REFERENCE_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)*[a-z]?")
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lower-cased words of `text`, with punctuation and whitespace differences removed."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def shingles(words: List[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed word `size`-grams of `words`."""
+    if len(words) < size:
+        return {_hash(" ".join(words))} if words else set()
+    return {_hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """MinHash signatures over shingle sets, with universal hash functions (a * x + b) mod p."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        return tuple(
+            min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in shingle_set)
+            for a, b in self.params
+        )
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def split_sections(text: str) -> List[str]:
+    """Split extracted page text into sections at Markdown headings (or blank lines if there are none)."""
+    sections: List[str] = []
+    current: List[str] = []
+    for line in text.splitlines():
+        if line.startswith("#") and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    if len(sections) == 1:
+        sections = [block for block in re.split(r"\n\s*\n", text) if block.strip()]
+    return sections
+
+
+def deduplicate_sources(
+    sources: List[Tuple[str, str]],
+    threshold: float = DUPLICATE_THRESHOLD,
+) -> List[Tuple[str, str]]:
+    """
+    Drop sections that are near-duplicates of a section already kept from an earlier source.
+
+    `sources` are (url, text) pairs, in priority order. Candidate pairs are found with LSH banding over the
+    MinHash signatures, so the cost stays linear in the number of sections. Sources left with no text are dropped.
+    """
+    hasher = MinHasher()
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[int, Tuple[int, ...]]]] = {}
+    result: List[Tuple[str, str]] = []
+    dropped = 0
+
+    for source_index, (url, text) in enumerate(sources):
+        kept: List[str] = []
+        for section in split_sections(text):
+            words = normalize_text(section)
+            if len(words) < MIN_SECTION_WORDS:
+                kept.append(section)
+                continue
+            signature = hasher.signature(shingles(words))
+            bands = [
+                (start, signature[start:start + BAND_ROWS]) for start in range(0, len(signature), BAND_ROWS)
+            ]
+            duplicate = any(
+                other_source != source_index and MinHasher.similarity(signature, other) >= threshold
+                for band in bands
+                for other_source, other in buckets.get(band, [])
+            )
+            if duplicate:
+                dropped += 1
+                continue
+            kept.append(section)
+            for band in bands:
+                buckets.setdefault(band, []).append((source_index, signature))
+        if any(normalize_text(section) for section in kept):
+            result.append((url, "\n\n".join(kept)))
+
+    if dropped:
+        Actor.log.info(f"Dropped {dropped} duplicate sections before summarization.")
+    return result
+
+
+def _strip_edition_years(reference: str) -> str:
+    """
+    Drop edition years ("CBC 2022, Section 1011.2" -> "CBC , Section 1011.2"). A year-like number is kept
+    when it follows a section word, or when it is the only number, so it must be the section itself
+    ("Section 2003", "IBC 1907").
+    """
+    def replace(match: re.Match) -> str:
+        if _SECTION_WORD_RE.search(reference[:match.start()]):
+            return match.group(0)
+        rest = reference[:match.start()] + reference[match.end():]
+        return " " if re.search(r"\d", rest) else match.group(0)
+
+    return _YEAR_RE.sub(replace, reference)
+
+
+def normalize_reference(code_reference: Optional[str]) -> str:
+    """
+    Canonical form of a code reference, e.g. "California Building Code 2022, Section 1011.2" and
+    "CBC §1011.2" both become "cbc 1011.2".
+    """
+    if not code_reference:
+        return ""
+    reference = code_reference.lower()
+    for name, alias in CODE_ALIASES:
+        reference = reference.replace(name, alias)
+    reference = _strip_edition_years(reference)
+    reference = _CHAPTER_RE.sub(" chapter ", reference)
+    reference = _REFERENCE_NOISE_RE.sub(" ", reference)
+    return " ".join(_REFERENCE_TOKEN_RE.findall(reference))
+
+
+def _normalize_category(category: str) -> str:
+    words = normalize_text(category)
+    return " ".join(w[:-1] if w.endswith("s") and len(w) > 3 else w for w in words)
+
+
+def _join_distinct(*values: Optional[str]) -> Optional[str]:
+    distinct: List[str] = []
+    for value in values:
+        if value and value not in distinct:
+            distinct.append(value)
+    return "; ".join(distinct) or None
+
+
+def _word_similarity(a: str, b: str) -> float:
+    words_a, words_b = set(normalize_text(a)), set(normalize_text(b))
+    if not words_a or not words_b:
+        return float(words_a == words_b)
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def merge_requirements(requirements: List[BuildingCodeRequirement]) -> List[BuildingCodeRequirement]:
+    """
+    Merge requirements that state the same thing about the same code section within the same category.
+
+    Entries are grouped by normalized `code_reference` and category, and within a group an entry is merged into
+    an earlier one only if their requirement texts are near-duplicates, so distinct requirements citing one
+    section (riser height and tread depth under the same stair section) are all kept. The first entry's wording
+    is kept, distinct applicability and notes are joined, and the `sources` of all merged entries are kept as
+    provenance.
+    """
+    groups: Dict[Tuple[str, str], List[BuildingCodeRequirement]] = {}
+    merged: List[BuildingCodeRequirement] = []
+    for requirement in requirements:
+        key = (_normalize_category(requirement.category), normalize_reference(requirement.code_reference))
+        group = groups.setdefault(key, [])
+        existing = next(
+            (r for r in group if _word_similarity(r.requirement, requirement.requirement) >= REQUIREMENT_DUPLICATE_THRESHOLD),
+            None,
+        )
+        if existing is None:
+            copy = requirement.model_copy(update={"sources": list(requirement.sources)})
+            group.append(copy)
+            merged.append(copy)
+            continue
+        existing.applicability = _join_distinct(existing.applicability, requirement.applicability)
+        existing.notes = _join_distinct(existing.notes, requirement.notes)
+        existing.sources.extend(url for url in requirement.sources if url not in existing.sources)
+    return merged
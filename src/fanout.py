@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import Awaitable, Callable, List, Optional, Set
+from urllib.parse import urlparse
+
+from apify import Actor
+
+from src.adapters import get_site_adapter, task_keywords
+from src.content import PageContent
+
+# Hosts that publish the code text itself (municipal code libraries, code publishers).
+CODE_HOSTS = (
+    "library.municode.com", "municode.com", "ecode360.com", "up.codes", "codelibrary.amlegal.com", "amlegal.com",
+    "codepublishing.com", "codes.iccsafe.org", "iccsafe.org", "ncc.abcb.gov.au", "qcode.us", "sterlingcodifiers.com",
+)
+# City and county sites outside .gov/.us, e.g. cityofantioch.org.
+MUNICIPAL_HOST_RE = re.compile(r"(?:www\.)?(?:cityof|countyof|townof)[a-z-]+\.")
+# Sites that are rarely worth a tab.
+LOW_VALUE_HOSTS = ("google.", "bing.com", "facebook.com", "yelp.com", "reddit.com", "youtube.com", "pinterest.")
+
+# References to code sections: "§ 9-5.301", "Section 1011.2", "Sec. 12.21", "R311.7", "H5D2".
+SECTION_REF_RE = re.compile(
+    r"(?:§+|\b(?i:sec(?:tion)?s?)\.?)\s*([0-9][0-9A-Za-z.\-]*[0-9A-Za-z])"
+    r"|\b([A-Z]{1,2}\d{3,4}(?:\.\d+)+)\b"
+    r"|\b([A-J]\d{1,2}[DPV]\d{1,2})\b"
+)
+# A section counts as covered only if its reference is followed by at least this many words of text,
+# so tables of contents and lists of links do not.
+MIN_SECTION_BODY_WORDS = 12
+
+
+def domain_authority(url: str) -> int:
+    """Rough authority of a search hit: official government sites and code publishers first."""
+    host = urlparse(url).netloc.lower()
+    if any(host == h or host.endswith("." + h) for h in CODE_HOSTS) or get_site_adapter(url):
+        return 4
+    # .us covers the locality domains (ci.antioch.ca.us, co.contra-costa.ca.us)
+    if host.endswith(".gov") or ".gov." in host or host.endswith(".us") or MUNICIPAL_HOST_RE.match(host):
+        return 3
+    if any(marker in host for marker in LOW_VALUE_HOSTS):
+        return 0
+    if host.endswith(".org") or host.endswith(".edu"):
+        return 2
+    return 1
+
+
+def rank_urls(urls: List[str]) -> List[str]:
+    """Deduplicate and order candidate URLs by domain authority, keeping search order within a tier."""
+    unique = list(dict.fromkeys(urls))
+    return sorted(unique, key=domain_authority, reverse=True)
+
+
+def covered_sections(contents: List[PageContent], user_task: str) -> Set[str]:
+    """
+    Distinct code sections in `contents` whose text is present and mentions at least one of the task's keywords.
+
+    A section is a line starting with a reference (a heading or a list item, e.g. "## Sec. 9-5.301 Fences")
+    followed by at least MIN_SECTION_BODY_WORDS words before the next such line.
+    """
+    keywords = task_keywords(user_task)
+    found: Set[str] = set()
+
+    def close(reference: Optional[str], block: List[str]) -> None:
+        if reference is None:
+            return
+        text = " ".join(block).lower()
+        if len(text.split()) - len(block[0].split()) < MIN_SECTION_BODY_WORDS:
+            return
+        if keywords and not any(k in text for k in keywords):
+            return
+        found.add(reference)
+
+    for content in contents:
+        reference: Optional[str] = None
+        block: List[str] = []
+        for line in content.text().splitlines():
+            match = SECTION_REF_RE.match(line.lstrip("#-* \t"))
+            if match:
+                close(reference, block)
+                reference = next(g for g in match.groups() if g).upper()
+                block = [line]
+            elif reference is not None:
+                block.append(line)
+        close(reference, block)
+    return found
+
+
+class FanOutController:
+    """
+    Runs agent tabs over ranked search hits progressively instead of all at once.
+
+    It starts with `initial_tabs` tabs, launches the next candidate whenever a tab fails or comes back without
+    enough coverage (up to `max_concurrent` running and `max_tabs` in total), and cancels the remaining tabs as
+    soon as the collected content covers `target_sections` distinct code sections relevant to the task.
+    """
+
+    def __init__(
+        self,
+        user_task: str,
+        run_tab: Callable[[str], Awaitable[List[PageContent]]],
+        initial_tabs: int = 2,
+        max_concurrent: int = 3,
+        max_tabs: int = 6,
+        target_sections: int = 5,
+    ):
+        self.user_task = user_task
+        self.run_tab = run_tab
+        self.initial_tabs = initial_tabs
+        self.max_concurrent = max_concurrent
+        self.max_tabs = max_tabs
+        self.target_sections = target_sections
+        self.launched = 0
+        self.failed = 0
+
+    async def run(self, urls: List[str]) -> List[PageContent]:
+        pending = rank_urls(urls)
+        running: Set[asyncio.Task] = set()
+        results: List[PageContent] = []
+
+        def launch(limit: int) -> None:
+            while pending and len(running) < limit and self.launched < self.max_tabs:
+                url = pending.pop(0)
+                self.launched += 1
+                Actor.log.info(f"Launching agent tab {self.launched} for: {url}")
+                running.add(asyncio.create_task(self.run_tab(url)))
+
+        launch(self.initial_tabs)
+        try:
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = [] if task.exception() else task.result()
+                    if result:
+                        results.extend(result)
+                    else:
+                        self.failed += 1
+
+                covered = covered_sections(results, self.user_task)
+                if len(covered) >= self.target_sections:
+                    Actor.log.info(
+                        f"Coverage reached ({len(covered)} sections), cancelling {len(running)} remaining tabs."
+                    )
+                    break
+                # Not covered yet: widen the fan-out (failed tabs are replaced the same way).
+                launch(self.max_concurrent)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        Actor.log.info(f"Fan-out finished: {self.launched} tabs launched, {self.failed} failed, {len(results)} results.")
+        return results
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from src.jurisdictions.base import JurisdictionPlugin
+from src.jurisdictions.ncc import NCCPlugin
+
+# Checked in order, the first plugin that matches the task wins.
+PLUGINS: List[JurisdictionPlugin] = [
+    NCCPlugin(),
+]
+
+
+def find_jurisdiction_plugin(user_task: str) -> Optional[JurisdictionPlugin]:
+    """Return the plugin handling the task's jurisdiction, if any."""
+    for plugin in PLUGINS:
+        if plugin.matches(user_task):
+            return plugin
+    return None
+
+
+__all__ = ['JurisdictionPlugin', 'NCCPlugin', 'PLUGINS', 'find_jurisdiction_plugin']
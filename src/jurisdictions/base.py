@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from src.content import ContentStore, PageContent
+
+
+class JurisdictionPlugin:
+    """
+    A jurisdiction with a known code-hosting site that can be researched deterministically,
+    without the search + LLM navigation loop.
+
+    Subclasses implement `matches` and `collect`; `summary_prompt` optionally replaces the
+    generic summarizer system prompt.
+    """
+    name: str = ""
+    summary_prompt: Optional[str] = None
+
+    def matches(self, user_task: str) -> bool:
+        """Return True if the task is about this jurisdiction."""
+        raise NotImplementedError
+
+    async def collect(self, user_task: str, store: ContentStore) -> List[PageContent]:
+        """Fetch the code content relevant to the task into `store`."""
+        raise NotImplementedError
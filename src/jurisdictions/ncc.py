@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from apify import Actor
+from pydantic import BaseModel
+
+from src.content import ContentStore, PageContent, extract_text
+from src.jurisdictions.base import JurisdictionPlugin
+from src.scraper import WebScraperActor
+from src.sessions import dismiss_consent
+
+NCC_BASE_URL = "https://ncc.abcb.gov.au"
+NCC_EDITION = "ncc-2022"
+NCC_EDITION_URL = f"{NCC_BASE_URL}/editions/{NCC_EDITION}/adopted"
+
+# Named key-value store the clause tree is cached in, so it survives across runs.
+CLAUSE_TREE_STORE = "ncc-clause-tree"
+
+NCC_VOLUMES: Dict[str, str] = {
+    "volume-one": "Volume One",
+    "volume-two": "Volume Two",
+    "volume-three": "Volume Three",
+    "housing-provisions": "ABCB Housing Provisions",
+}
+
+# Max parts fetched per task when resolving by keywords.
+MAX_PARTS = 3
+# Max section pages followed per volume when a volume page does not link parts directly.
+MAX_SECTION_PAGES = 20
+
+# Unambiguous: the code itself or the country.
+AUSTRALIA_RE = re.compile(
+    r"\b(NCC|BCA|ABCB|national construction code|building code of australia|australian?)\b",
+    re.IGNORECASE,
+)
+# Australian states and capitals. Most are also US place names ("Brisbane, CA", "Melbourne, FL",
+# "Victoria, TX"), so they only count together with AUSTRALIAN_CONTEXT_RE.
+AUSTRALIAN_PLACE_RE = re.compile(
+    r"\b(new south wales|victoria|queensland|tasmania|northern territory|western australia|south australia|"
+    r"australian capital territory|sydney|melbourne|brisbane|perth|adelaide|hobart|canberra|darwin)\b",
+    re.IGNORECASE,
+)
+AUSTRALIAN_CONTEXT_RE = re.compile(
+    r"\b(NSW|QLD|VIC|TAS|ACT|NT|SA)\b"
+    r"|(?i:\bclass\s*(?:10|[1-9])[a-c]?\s+(?:building|dwelling)s?\b|\bgranny flat|\bsecondary dwelling|\bshire\b)"
+)
+# "…, CA" / "…, FL": a US city. WA is left out, it is also Western Australia.
+US_STATE_RE = re.compile(
+    r",\s*(AL|AK|AZ|AR|CA|CO|CT|DE|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|"
+    r"NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WV|WI|WY|DC)\b"
+    r"|\b(USA|U\.S\.A?\.?|United States)\b"
+)
+# NCC 2022 clause IDs ("H5D2", "D2D13", "H5P1") and Housing Provisions clauses ("11.2.2").
+CLAUSE_ID_RE = re.compile(r"\b([A-J]\d{1,2})[DPV]\d{1,2}\b|\b(\d{1,2}\.\d{1,2})\.\d{1,2}\b")
+# Clause IDs as users type them ("h5d2"). Only the NCC 2022 form is specific enough to identify the code.
+TASK_CLAUSE_ID_RE = re.compile(CLAUSE_ID_RE.pattern, re.IGNORECASE)
+NCC_CLAUSE_ID_RE = re.compile(r"\b[A-J]\d{1,2}[DPV]\d{1,2}\b", re.IGNORECASE)
+PART_ID_RE = re.compile(r"\bpart\s+([A-J]?\d{1,2}(?:\.\d{1,2})?)\b", re.IGNORECASE)
+PART_SLUG_RE = re.compile(r"^part-([a-j]?\d{1,2})-")
+
+VOLUME_HINTS: List[Tuple[re.Pattern, List[str]]] = [
+    (re.compile(r"\bvolume\s+(one|1)\b", re.I), ["volume-one"]),
+    (re.compile(r"\bvolume\s+(two|2)\b", re.I), ["volume-two", "housing-provisions"]),
+    (re.compile(r"\bvolume\s+(three|3)\b", re.I), ["volume-three"]),
+    (re.compile(r"\bhousing provisions\b", re.I), ["housing-provisions"]),
+    (re.compile(r"plumbing|drainage|sanitary|stormwater|hot water", re.I), ["volume-three"]),
+    (
+        re.compile(r"\bclass\s*(?:10|1)[ab]?\b|house|dwelling|\bhome\b|granny flat|garage|shed|carport|deck|pergola", re.I),
+        ["housing-provisions", "volume-two"],
+    ),
+    (
+        re.compile(r"\bclass\s*[2-9][a-c]?\b|apartment|commercial|office|retail|warehouse|hospital|school", re.I),
+        ["volume-one"],
+    ),
+]
+
+# Task words -> words that appear in NCC part titles.
+TOPIC_SYNONYMS: Dict[str, List[str]] = {
+    "stair": ["stairway", "movement", "access"],
+    "balustrade": ["barrier", "movement", "access"],
+    "handrail": ["handrail", "barrier", "movement"],
+    "fire": ["fire", "safety", "separation"],
+    "smoke": ["smoke", "alarm", "fire"],
+    "energy": ["energy", "efficiency"],
+    "insulation": ["energy", "efficiency", "thermal"],
+    "waterproofing": ["waterproofing", "wet", "area"],
+    "damp": ["damp", "weatherproofing"],
+    "termite": ["termite", "management"],
+    "footing": ["footing", "slab"],
+    "slab": ["footing", "slab"],
+    "roof": ["roof", "roofing", "cladding"],
+    "wall": ["wall", "cladding", "masonry", "framing"],
+    "glazing": ["glazing", "glass"],
+    "window": ["glazing", "window"],
+    "ventilation": ["ventilation", "light", "health", "amenity"],
+    "sound": ["sound", "transmission"],
+    "bushfire": ["bushfire"],
+    "egress": ["egress", "access", "movement"],
+    "ceiling": ["ceiling", "height", "room"],
+}
+
+STOPWORDS = {
+    "the", "and", "for", "with", "find", "what", "are", "new", "requirement", "requirements", "ncc", "bca",
+    "code", "building", "australia", "australian", "class", "volume", "part", "clause", "from", "into", "about",
+}
+
+NCC_SUMMARY_PROMPT = """
+You are an expert in the National Construction Code (NCC) / Building Code of Australia (BCA).
+
+You will be given:
+- The user's task (e.g. "Find stair and balustrade requirements for a new Class 1 dwelling").
+- The text of one or more NCC/BCA part or clause pages from ncc.abcb.gov.au, each wrapped in SOURCE markers.
+
+Your job:
+- Identify the key code requirements that are relevant to the user's task,
+  focusing on new construction (not only existing building exceptions).
+- Use the NCC 2022 edition as your default assumption unless the text clearly
+  indicates a different edition.
+- Summarise the requirements in clear, non-legal language.
+
+You MUST:
+- Fill the BuildingCodeReport schema, with "Australia" (or the state, if given) as jurisdiction
+  and the NCC volume as code_source (e.g. "NCC 2022 Volume Two").
+- Provide concise requirement statements (not entire clause text).
+- Include code references where visible (e.g. "NCC 2022 Vol 2 Part H5, Clause H5D2").
+- List in each requirement's `sources` the SOURCE URL(s) it was found on.
+- List any important assumptions you made (e.g. building class, volume).
+
+This is informational guidance only, not legal advice.
+"""
+
+
+class NCCClause(BaseModel):
+    clause_id: str                    # e.g. "H5D2", "11.2.2"
+    title: str
+    anchor: Optional[str] = None      # fragment id on the part page
+
+
+class NCCPart(BaseModel):
+    part_id: str                      # e.g. "H5", "11.2"
+    title: str
+    url: str
+    clauses: Optional[List[NCCClause]] = None   # None until the part page has been crawled
+
+
+class NCCVolume(BaseModel):
+    key: str                          # e.g. "volume-two"
+    title: str
+    url: str
+    parts: List[NCCPart] = []
+
+
+class NCCClauseTree(BaseModel):
+    edition: str
+    volumes: List[NCCVolume] = []
+
+    def volume(self, key: str) -> Optional[NCCVolume]:
+        return next((v for v in self.volumes if v.key == key), None)
+
+    def find_part(self, part_id: str, volume_keys: List[str]) -> Optional[NCCPart]:
+        """Find a part by ID, preferring the given volumes."""
+        ordered = [self.volume(k) for k in volume_keys] + self.volumes
+        for volume in ordered:
+            if volume is None:
+                continue
+            for part in volume.parts:
+                if part.part_id.upper() == part_id.upper():
+                    return part
+        return None
+
+
+class _LinkParser(HTMLParser):
+    """Collects (href, text) pairs of all links on a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Tuple[str, str]] = []
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            self.links.append((self._href, " ".join("".join(self._text).split())))
+            self._href = None
+
+
+class _ClauseParser(HTMLParser):
+    """Collects clause headings (and their fragment ids) from a part page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.clauses: List[NCCClause] = []
+        self._last_id: Optional[str] = None
+        self._heading: Optional[List[str]] = None
+        self._heading_id: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        element_id = dict(attrs).get("id")
+        if element_id:
+            self._last_id = element_id
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self._heading = []
+            self._heading_id = element_id or self._last_id
+
+    def handle_data(self, data):
+        if self._heading is not None:
+            self._heading.append(data)
+
+    def handle_endtag(self, tag):
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6") and self._heading is not None:
+            title = " ".join("".join(self._heading).split())
+            match = CLAUSE_ID_RE.match(title)
+            if match and not any(c.clause_id == match.group(0) for c in self.clauses):
+                self.clauses.append(NCCClause(clause_id=match.group(0), title=title, anchor=self._heading_id))
+            self._heading = None
+
+
+def _tokens(text: str) -> Set[str]:
+    """Lower-cased, crudely singularised words of `text`, without stopwords."""
+    words = re.findall(r"[a-z]+", text.lower())
+    return {w[:-1] if w.endswith("s") and len(w) > 3 else w for w in words if len(w) > 2 and w not in STOPWORDS}
+
+
+def _part_id_from_link(href: str, text: str) -> Optional[str]:
+    match = PART_ID_RE.search(text)
+    if match:
+        return match.group(1).upper()
+    slug = urlparse(href).path.rstrip("/").rsplit("/", 1)[-1]
+    match = PART_SLUG_RE.match(slug)
+    return match.group(1).upper() if match else None
+
+
+def _slice_clauses(text: str, clause_ids: Set[str]) -> str:
+    """Keep only the blocks of `text` belonging to the given clauses, from their heading to the next clause heading."""
+    kept: List[str] = []
+    keeping = False
+    for line in text.splitlines():
+        match = CLAUSE_ID_RE.match(line.lstrip("# "))
+        if match:
+            keeping = match.group(0) in clause_ids
+        if keeping:
+            kept.append(line)
+    return "\n".join(kept)
+
+
+class NCCPlugin(JurisdictionPlugin):
+    """
+    National Construction Code / Building Code of Australia on ncc.abcb.gov.au.
+
+    The site is organised as edition -> volumes -> parts -> clauses, and NCC 2022 clause IDs encode their
+    part ("H5D2" is in Part H5). The plugin crawls the volume and part index once, caches it in a named
+    key-value store, and resolves tasks to part/clause pages directly: by explicit clause or part IDs in
+    the task, otherwise by matching the task's topic against part titles. Clause lists are added to the
+    cached tree as part pages are visited.
+    """
+    name = "NCC"
+    summary_prompt = NCC_SUMMARY_PROMPT
+
+    def __init__(self):
+        self._tree: Optional[NCCClauseTree] = None
+
+    def matches(self, user_task: str) -> bool:
+        if AUSTRALIA_RE.search(user_task) or NCC_CLAUSE_ID_RE.search(user_task):
+            return True
+        if US_STATE_RE.search(user_task):
+            return False
+        return bool(AUSTRALIAN_PLACE_RE.search(user_task) and AUSTRALIAN_CONTEXT_RE.search(user_task))
+
+    @staticmethod
+    def select_volumes(user_task: str) -> List[str]:
+        """Volumes to look in, most likely first."""
+        for pattern, volumes in VOLUME_HINTS:
+            if pattern.search(user_task):
+                return volumes
+        return ["volume-two", "housing-provisions", "volume-one"]
+
+    @staticmethod
+    async def _fetch(page, url: str) -> str:
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            await dismiss_consent(page)
+            return await page.content()
+        except Exception as e:
+            Actor.log.warning(f"[NCC] Failed to fetch {url}: {e}")
+            return ""
+
+    async def _crawl_volume(self, page, key: str) -> NCCVolume:
+        volume = NCCVolume(key=key, title=NCC_VOLUMES[key], url=f"{NCC_EDITION_URL}/{key}")
+        pending = [volume.url]
+        seen = {volume.url}
+        part_ids: Set[str] = set()
+        while pending and len(seen) <= MAX_SECTION_PAGES:
+            parser = _LinkParser()
+            parser.feed(await self._fetch(page, pending.pop(0)))
+            for href, text in parser.links:
+                url = urldefrag(urljoin(volume.url + "/", href))[0].rstrip("/")
+                if not url.startswith(volume.url + "/"):
+                    continue
+                part_id = _part_id_from_link(url, text)
+                if part_id:
+                    if part_id not in part_ids:
+                        part_ids.add(part_id)
+                        volume.parts.append(NCCPart(part_id=part_id, title=text or part_id, url=url))
+                elif "section" in url.rsplit("/", 1)[-1] and url not in seen:
+                    # Volume pages may only link sections, which in turn link the parts.
+                    seen.add(url)
+                    pending.append(url)
+        Actor.log.info(f"[NCC] Crawled {volume.title}: {len(volume.parts)} parts")
+        return volume
+
+    async def load_tree(self, page) -> NCCClauseTree:
+        """
+        Return the clause tree from memory, the key-value store cache, or a fresh crawl.
+        Volumes without parts (their page failed to load when the tree was cached) are crawled again.
+        """
+        if self._tree is not None:
+            return self._tree
+        store = await Actor.open_key_value_store(name=CLAUSE_TREE_STORE)
+        cached = await store.get_value(NCC_EDITION)
+        tree = NCCClauseTree.model_validate(cached) if cached else NCCClauseTree(edition=NCC_EDITION)
+
+        crawled = False
+        for index, key in enumerate(NCC_VOLUMES):
+            volume = tree.volume(key)
+            if volume is not None and volume.parts:
+                continue
+            fresh = await self._crawl_volume(page, key)
+            if volume is None:
+                tree.volumes.insert(index, fresh)
+            else:
+                volume.parts = fresh.parts
+            crawled = crawled or bool(fresh.parts)
+        self._tree = tree
+        if crawled:
+            await self.save_tree()
+        return tree
+
+    async def save_tree(self) -> None:
+        store = await Actor.open_key_value_store(name=CLAUSE_TREE_STORE)
+        await store.set_value(NCC_EDITION, self._tree.model_dump())
+
+    def resolve(self, tree: NCCClauseTree, user_task: str) -> List[Tuple[NCCPart, Set[str]]]:
+        """Resolve the task to parts to fetch, each with the clause IDs to keep (empty = whole part)."""
+        volumes = self.select_volumes(user_task)
+        resolved: Dict[str, Tuple[NCCPart, Set[str]]] = {}
+
+        for match in TASK_CLAUSE_ID_RE.finditer(user_task):
+            part = tree.find_part(match.group(1) or match.group(2), volumes)
+            if part:
+                resolved.setdefault(part.url, (part, set()))[1].add(match.group(0).upper())
+        for match in PART_ID_RE.finditer(user_task):
+            part = tree.find_part(match.group(1), volumes)
+            if part:
+                resolved.setdefault(part.url, (part, set()))[1].clear()
+        if resolved:
+            return list(resolved.values())
+
+        # No explicit IDs: rank the parts of the selected volumes by topic overlap with their titles.
+        wanted = _tokens(user_task)
+        for word in list(wanted):
+            wanted |= _tokens(" ".join(TOPIC_SYNONYMS.get(word, [])))
+        scored = []
+        for rank, key in enumerate(volumes):
+            volume = tree.volume(key)
+            for part in volume.parts if volume else []:
+                score = len(wanted & _tokens(part.title))
+                if score:
+                    # Earlier (more likely) volumes win ties.
+                    scored.append((score, -rank, part))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [(part, set()) for _, _, part in scored[:MAX_PARTS]]
+
+    async def collect(self, user_task: str, store: ContentStore) -> List[PageContent]:
+        page, context = await WebScraperActor.new_page(NCC_BASE_URL)
+        try:
+            tree = await self.load_tree(page)
+            targets = self.resolve(tree, user_task)
+            Actor.log.info(f"[NCC] Resolved task to parts: {[p.part_id for p, _ in targets]}")
+
+            contents: List[PageContent] = []
+            tree_changed = False
+            for part, clause_ids in targets:
+                html = await self._fetch(page, part.url)
+                if not html:
+                    continue
+                if part.clauses is None:
+                    parser = _ClauseParser()
+                    parser.feed(html)
+                    part.clauses = parser.clauses
+                    tree_changed = True
+
+                text, truncated = extract_text(html, store.page_limit)
+                url = part.url
+                if clause_ids:
+                    sliced = _slice_clauses(text, clause_ids)
+                    if sliced:
+                        text = sliced
+                        anchors = [c.anchor for c in part.clauses if c.clause_id in clause_ids and c.anchor]
+                        if len(anchors) == 1:
+                            url = f"{part.url}#{anchors[0]}"
+                content = store.add_text(url, text, truncated)
+                if content:
+                    contents.append(content)
+
+            if tree_changed:
+                await self.save_tree()
+            return contents
+        finally:
+            await WebScraperActor.close_page(page, context, NCC_BASE_URL)
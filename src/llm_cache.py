@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from apify import Actor
+
+# Named key-value store holding the cache, shared across runs.
+CACHE_STORE = "llm-response-cache"
+# Record holding the cache keys in LRU order (least recently used first).
+INDEX_KEY = "LRU_INDEX"
+# Calls above this temperature are not deterministic enough to be cached.
+MAX_CACHEABLE_TEMPERATURE = 0.3
+# Entries kept before the least recently used ones are evicted.
+MAX_ENTRIES = 2000
+# The index is persisted after this many new entries (and on `flush`).
+PERSIST_EVERY = 20
+
+_VOLATILE_HTML_RE = re.compile(
+    r"<script\b.*?</script>|<style\b.*?</style>|<!--.*?-->|<svg\b.*?</svg>",
+    re.IGNORECASE | re.DOTALL,
+)
+_VOLATILE_ATTR_RE = re.compile(
+    r"""\s(?:nonce|integrity|data-[\w-]+|csrf[\w-]*|_?token|style|aria-[\w-]+)=("[^"]*"|'[^']*'|[^\s>]+)""",
+    re.IGNORECASE,
+)
+
+
+def distill_page_state(html: str) -> str:
+    """
+    The part of a page snapshot that identifies its state: scripts, styles, comments and per-load attributes
+    (nonces, tokens, data-*) are dropped and whitespace is collapsed, so reloading the same page gives the
+    same value.
+    """
+    html = _VOLATILE_HTML_RE.sub("", html)
+    html = _VOLATILE_ATTR_RE.sub("", html)
+    return " ".join(html.split())
+
+
+def cache_key(model: str, temperature: float, messages: List[dict], page_state: Optional[str] = None, **extra: Any) -> str:
+    """Stable hash of everything that determines a low-temperature response."""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages, "page_state": page_state, **extra},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Size-bounded LRU cache of LLM responses, persisted in a named key-value store.
+
+    Each response is its own record (keyed by `cache_key`), and an index record keeps the LRU order so
+    eviction also deletes the evicted records from the store. The index is only a hint: records it does not
+    list (written by a concurrent run whose index was overwritten, or by a run that crashed before saving
+    its index) are adopted as least recently used when the cache is loaded, and evicted first.
+    With `bypass` set, lookups always miss but fresh responses are still stored. With `persist` unset, the
+    cache lives in memory only and the store is neither read nor written.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.bypass = False
+        self.persist = True
+        self.hits = 0
+        self.misses = 0
+        self._index: OrderedDict[str, None] = OrderedDict()
+        self._values: dict = {}
+        self._store = None
+        self._loaded = False
+        self._unsaved = 0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def cacheable(temperature: float) -> bool:
+        return temperature <= MAX_CACHEABLE_TEMPERATURE
+
+    async def _load(self) -> None:
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            if not self.persist:
+                self._loaded = True
+                return
+            try:
+                self._store = await Actor.open_key_value_store(name=CACHE_STORE)
+                indexed = await self._store.get_value(INDEX_KEY) or []
+                stored = [record.key async for record in self._store.iterate_keys() if record.key != INDEX_KEY]
+            except Exception as e:
+                Actor.log.warning(f"LLM cache unavailable, continuing without persistence: {e}")
+                self._store = None
+                self._loaded = True
+                return
+            present, listed = set(stored), set(indexed)
+            orphans = [key for key in stored if key not in listed]
+            for key in orphans + [key for key in indexed if key in present]:
+                self._index[key] = None
+            if orphans or len(self._index) - len(orphans) < len(indexed):
+                # Adopted orphans or dropped keys whose record is gone: the stored index is out of date
+                self._unsaved += 1
+            await self._evict()
+            self._loaded = True
+
+    async def get(self, key: str) -> Optional[Any]:
+        if self.bypass:
+            return None
+        await self._load()
+        if key not in self._index:
+            self.misses += 1
+            return None
+        value = self._values.get(key)
+        if value is None and self._store is not None:
+            value = await self._store.get_value(key)
+        if value is None:
+            # Listed in the index but the record is gone
+            self._index.pop(key, None)
+            self.misses += 1
+            return None
+        self._index.move_to_end(key)
+        self._values[key] = value
+        self.hits += 1
+        return value
+
+    async def put(self, key: str, value: Any) -> None:
+        await self._load()
+        self._index[key] = None
+        self._index.move_to_end(key)
+        self._values[key] = value
+        if self._store is None:
+            await self._evict()
+            return
+        try:
+            await self._store.set_value(key, value)
+        except Exception as e:
+            Actor.log.warning(f"Failed to persist LLM cache entry: {e}")
+        self._unsaved += 1
+        await self._evict()
+        if self._unsaved >= PERSIST_EVERY:
+            await self.flush()
+
+    async def _evict(self) -> None:
+        """Drop the least recently used entries above `max_entries`, from memory and from the store."""
+        while len(self._index) > self.max_entries:
+            old_key, _ = self._index.popitem(last=False)
+            self._values.pop(old_key, None)
+            if self._store is None:
+                continue
+            try:
+                await self._store.delete_value(old_key)
+                self._unsaved += 1
+            except Exception as e:
+                Actor.log.warning(f"Failed to evict LLM cache entry: {e}")
+
+    async def flush(self) -> None:
+        """Persist the LRU index."""
+        if self._store is None or not self._unsaved:
+            return
+        try:
+            await self._store.set_value(INDEX_KEY, list(self._index))
+            self._unsaved = 0
+        except Exception as e:
+            Actor.log.warning(f"Failed to persist LLM cache index: {e}")
+
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,147 @@
+"""
+Throughput load test for concurrent research runs.
+
+Runs `run_research_agent` for `--tasks` synthetic queries at each concurrency level, against a local
+static code site and a fake OpenAI-compatible endpoint with configurable latency, so the numbers reflect
+the Actor's own overhead (browser tabs, parsing, event loop) rather than the network or a real model.
+
+    python -m src.loadtest --tasks 20 --concurrency 1,4,8 --llm-latency 0.5 --output loadtest.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List
+
+from src.loadtest.standins import StandInServer, code_site_handler, fake_llm_handler
+
+TASK_TOPICS = ["stair width", "handrail height", "guard height", "parking spaces", "side setbacks", "fence height"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.loadtest", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10, help="research runs per concurrency level")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated concurrency levels, e.g. 1,4,8")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake LLM response time in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="+/- random spread of the LLM latency")
+    parser.add_argument("--pages", type=int, default=6, help="chapter pages on the local code site")
+    parser.add_argument("--page-kb", type=int, default=200, help="approximate size of each chapter page in KB")
+    parser.add_argument("--max-steps", type=int, default=5, help="agent steps per tab")
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    return parser.parse_args()
+
+
+def synthetic_tasks(count: int, level: int) -> List[str]:
+    # Unique per run and level, so neither checkpoints nor the LLM cache could short-circuit a run.
+    return [
+        f"Find {TASK_TOPICS[i % len(TASK_TOPICS)]} requirements for a single family house in Testville "
+        f"(load test {level}-{i})"
+        for i in range(count)
+    ]
+
+
+async def run_level(level: int, args: argparse.Namespace, site_url: str) -> dict:
+    from apify import Actor
+
+    from src.loadtest.metrics import ResourceSampler, percentile
+    from src.scraper import WebScraperActor, run_research_agent
+
+    semaphore = asyncio.Semaphore(level)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(task: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                report = await run_research_agent(task, args.max_steps, start_urls=[site_url, f"{site_url}/codes"])
+                if not report.requirements:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    # Hold a research run open for the whole level, so the browser is launched once per level and not once
+    # per task whenever the concurrent runs drop to zero (always, at concurrency 1).
+    WebScraperActor.active_runs += 1
+    try:
+        await WebScraperActor.get_browser()
+    except Exception as e:
+        Actor.log.error(f"Browser launch failed, every task will fail: {e}")
+
+    sampler = ResourceSampler()
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(task) for task in synthetic_tasks(args.tasks, level)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await sampler.stop()
+        WebScraperActor.active_runs -= 1
+        if not WebScraperActor.active_runs:
+            await WebScraperActor.close()
+
+    def ms(value) -> float:
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "concurrency": level,
+        "tasks": args.tasks,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_min": round(args.tasks / elapsed * 60, 2) if elapsed else None,
+        "latency_p50_ms": ms(percentile(latencies, 50)),
+        "latency_p95_ms": ms(percentile(latencies, 95)),
+        "latency_p99_ms": ms(percentile(latencies, 99)),
+        **sampler.summary(),
+    }
+
+
+def format_table(results: List[dict]) -> str:
+    columns = [
+        "concurrency", "tasks", "errors", "throughput_per_min", "latency_p50_ms", "latency_p95_ms",
+        "latency_p99_ms", "peak_rss_mb", "max_open_pages", "loop_lag_max_ms", "loop_lag_p99_ms",
+    ]
+    rows = [columns] + [[str(r.get(c)) for c in columns] for r in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.rjust(w) for cell, w in zip(row, widths)) for row in rows)
+
+
+async def main(args: argparse.Namespace) -> None:
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    with StandInServer(code_site_handler(args.pages, args.page_kb)) as site, \
+            StandInServer(fake_llm_handler(args.llm_latency, args.llm_jitter, args.pages)) as llm:
+        # Must be set before the shared OpenAI client is created on the first LLM call.
+        os.environ["LLM_BASE_URL"] = f"{llm.url}/v1"
+
+        from apify import Actor
+
+        from src.checkpoint import checkpoints
+        from src.llm_cache import llm_cache
+        from src.sessions import domain_sessions
+
+        async with Actor:
+            # Keep the shared stores out of the measurements and free of load-test records
+            checkpoints.enabled = False
+            llm_cache.bypass = True
+            llm_cache.persist = False
+            domain_sessions.persist = False
+
+            results = []
+            for level in levels:
+                Actor.log.info(f"Load test: {args.tasks} tasks at concurrency {level}")
+                results.append(await run_level(level, args, site.url))
+
+            # Inside the Actor context: leaving it exits the process.
+            print(format_table(results))
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+
+asyncio.run(main(parse_args()))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from typing import List, Optional
+
+from src.scraper import WebScraperActor
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil ships with the Apify SDK's dependencies
+    psutil = None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, or None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _tree_rss_bytes(process) -> int:
+    """RSS of `process` and all its children (the Playwright driver and Chromium processes)."""
+    total = 0
+    for proc in [process, *process.children(recursive=True)]:
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total
+
+
+class ResourceSampler:
+    """
+    Samples resource usage in the background while a load level runs.
+
+    Every `interval` seconds it records the RSS of the whole process tree (including the browser),
+    the number of open browser pages, and how late the event loop woke up compared to the requested
+    sleep, which is how long the loop was blocked.
+    """
+
+    def __init__(self, interval: float = 0.1) -> None:
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self.max_open_pages = 0
+        self.loop_lag: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+        self._process = psutil.Process(os.getpid()) if psutil else None
+
+    def _sample(self) -> None:
+        if self._process is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, _tree_rss_bytes(self._process))
+        self.max_open_pages = max(self.max_open_pages, WebScraperActor.open_page_count())
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.loop_lag.append(max(0.0, time.perf_counter() - started - self.interval))
+            self._sample()
+
+    def start(self) -> None:
+        self._sample()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def summary(self) -> dict:
+        return {
+            "peak_rss_mb": round(self.peak_rss_bytes / 2**20, 1) if self._process is not None else None,
+            "max_open_pages": self.max_open_pages,
+            "loop_lag_max_ms": round(max(self.loop_lag, default=0.0) * 1000, 1),
+            "loop_lag_p99_ms": round((percentile(self.loop_lag, 99) or 0.0) * 1000, 1),
+        }
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+CODE_TOPICS = ["Stairways", "Guards and handrails", "Parking", "Setbacks", "Fences and walls", "Accessory dwelling units"]
+
+_COOKIE_BANNER = """
+<div id="onetrust-banner-sdk" class="cookie-consent">
+  <p>We use cookies to improve your experience.</p>
+  <button id="onetrust-accept-btn-handler"
+          onclick="document.cookie='consent=yes; path=/'; this.parentElement.remove()">Accept All Cookies</button>
+</div>
+"""
+
+
+def _page(title: str, body: str, with_banner: bool) -> bytes:
+    banner = _COOKIE_BANNER if with_banner else ""
+    return (
+        f"<!doctype html><html><head><title>{title}</title>"
+        f"<script>window.__state = {{ts: {time.time()}}};</script></head>"
+        f"<body>{banner}<nav><a href='/'>Code home</a></nav><main><h1>{title}</h1>{body}</main></body></html>"
+    ).encode("utf-8")
+
+
+def code_site_handler(chapters: int, page_kb: int):
+    """Handler class for a static municipal-code site: a table of contents and `chapters` heavy chapter pages."""
+
+    class CodeSiteHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            with_banner = "consent=yes" not in (self.headers.get("Cookie") or "")
+            if self.path in ("/", "/codes"):
+                links = "".join(
+                    f"<li><a href='/codes/chapter-{i}'>Chapter {i} - {CODE_TOPICS[i % len(CODE_TOPICS)]}</a></li>"
+                    for i in range(1, chapters + 1)
+                )
+                self._send(200, _page("Testville Municipal Code", f"<ul class='toc'>{links}</ul>", with_banner))
+            elif self.path.startswith("/codes/chapter-"):
+                try:
+                    number = int(self.path.rsplit("-", 1)[-1])
+                except ValueError:
+                    number = 0
+                if not 1 <= number <= chapters:
+                    self._send(404, _page("Not found", "<p>No such chapter.</p>", False))
+                    return
+                self._send(200, _page(f"Chapter {number}", self._chapter_body(number), with_banner))
+            else:
+                self._send(404, _page("Not found", "<p>No such page.</p>", False))
+
+        @staticmethod
+        def _chapter_body(number: int) -> str:
+            topic = CODE_TOPICS[number % len(CODE_TOPICS)]
+            sections = []
+            size = 0
+            section = 1
+            while size < page_kb * 1024:
+                text = (
+                    f"<h2>Section {number}0{section}.{section % 7 + 1} {topic} - stair and building requirements</h2>"
+                    f"<p>{'The minimum stair width serving an occupant load shall be 36 inches. ' * 12}</p>"
+                )
+                sections.append(text)
+                size += len(text)
+                section += 1
+            return "".join(sections)
+
+        def _send(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return CodeSiteHandler
+
+
+def fake_llm_handler(latency: float, jitter: float, chapters: int):
+    """
+    Handler class for an OpenAI-compatible /chat/completions endpoint.
+
+    Agent-action calls get "NAVIGATE /codes/chapter-N" on the first step (N derived from the prompt, so tasks
+    spread over the chapters) and "EXTRACT" afterwards;
+    structured-output calls (with a `response_format`) get a minimal valid BuildingCodeReport.
+    Every response is delayed by `latency` +/- `jitter` seconds.
+    """
+
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+            if request.get("response_format"):
+                content = json.dumps({
+                    "task": "load test",
+                    "jurisdiction": "Testville",
+                    "code_source": "Testville Municipal Code",
+                    "assumptions": [],
+                    "requirements": [{
+                        "category": "Stairs",
+                        "code_reference": "TMC 101.2",
+                        "requirement": "Stairs must be at least 36 inches wide.",
+                        "applicability": None,
+                        "notes": None,
+                        "sources": [],
+                    }],
+                })
+            else:
+                prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+                if "RECENT ACTIONS:\n(none)" in prompt:
+                    chapter = zlib.crc32(prompt.encode("utf-8")) % chapters + 1
+                    content = f"NAVIGATE /codes/chapter-{chapter}"
+                else:
+                    content = "EXTRACT"
+
+            body = json.dumps({
+                "id": "chatcmpl-loadtest",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FakeLLMHandler
+
+
+class StandInServer:
+    """A ThreadingHTTPServer on a free local port, served from a daemon thread."""
+
+    def __init__(self, handler) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> StandInServer:
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -11,15 +11,75 @@ from __future__ import annotations
 import logging
 
 from apify import Actor
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
 
-from src.tools import tool_research_building_code
-from src.utils import log_state
+from src.checkpoint import checkpoint_key, checkpoints
+from src.llm_cache import llm_cache
+from src.profiling import startup_profiler
 
 import os
 
 
+def create_agent_graph(model_name: str):
+    """Build the ReAct agent graph.
+
+    LangChain, LangGraph and the scraper stack (playwright, openai) are imported here rather than at module load,
+    so they are only paid for once the input has been read and the agent is actually needed.
+    """
+    from langchain_openai import ChatOpenAI
+    from langgraph.prebuilt import create_react_agent
+
+    from src.tools import tool_research_building_code
+
+    llm = ChatOpenAI(
+        model=model_name,
+        base_url="https://openrouter.apify.actor/api/v1",
+        api_key="no-key-required-but-must-not-be-empty",
+        default_headers={"Authorization": f"Bearer {os.getenv('APIFY_TOKEN')}"}
+    )
+
+    # Create the ReAct agent graph
+    # see https://langchain-ai.github.io/langgraph/reference/prebuilt/?h=react#langgraph.prebuilt.chat_agent_executor.create_react_agent
+    tools = [tool_research_building_code]
+
+    # We might want to use a more generic output format or just the report directly.
+    # For now, let's keep it simple. The agent will use the tool and return the result.
+    # Since the tool returns a complex object (BCARequirementReport), we need to ensure the agent can handle it.
+    # Ideally, the agent should just return the result of the tool call if it answers the query.
+
+    return create_react_agent(llm, tools)
+
+
+async def load_graph_messages(key: str) -> list:
+    """Load the agent's message history from a checkpoint, ready to be fed back into the graph.
+
+    A trailing AI message whose tool calls never got their results (the run stopped while the tool was running)
+    is dropped, so the agent decides again; the tool's own checkpoints make repeating the call cheap.
+    """
+    from langchain_core.messages import AIMessage, messages_from_dict
+
+    saved = await checkpoints.load(key)
+    if not saved:
+        return []
+    messages = messages_from_dict(saved)
+    if messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+        messages = messages[:-1]
+    Actor.log.info(f'Resuming the agent from a checkpoint with {len(messages)} messages.')
+    return messages
+
+
+def is_final_answer(message) -> bool:
+    from langchain_core.messages import AIMessage
+
+    return isinstance(message, AIMessage) and not message.tool_calls and bool(message.content)
+
+
+async def save_startup_profile() -> None:
+    """Log the startup profile and store it as `STARTUP_PROFILE` in the key-value store."""
+    Actor.log.info(startup_profiler.format_report())
+    store = await Actor.open_key_value_store()
+    await store.set_value('STARTUP_PROFILE', startup_profiler.report(top=None))
+
+
 async def main() -> None:
     """Define a main entry point for the Apify Actor.
 
@@ -31,12 +91,21 @@ async def main() -> None:
         ValueError: If the input is missing required attributes.
     """
     async with Actor:
-        # Charge for Actor start
-        await Actor.charge('actor-start')
+        # Charge for Actor start, once per run: not again when a migrated or restarted run starts over
+        start_checkpoint = checkpoint_key('charged', 'actor-start')
+        if not await checkpoints.load(start_checkpoint):
+            await checkpoints.save(start_checkpoint, True)
+            await Actor.charge('actor-start')
 
         # Handle input
         actor_input = await Actor.get_input() or {}
 
+        if actor_input.get('profileStartup', False):
+            # Installed late, so only the lazily imported agent stack is covered.
+            # Set ACTOR_PROFILE_STARTUP=1 to profile the whole process from the start.
+            startup_profiler.install()
+        startup_profiler.mark('input-loaded')
+
         query = actor_input.get('query')
         model_name = actor_input.get('modelName', 'gpt-4o-mini')
         
@@ -48,30 +117,37 @@ async def main() -> None:
             Actor.log.warning('Missing "query" attribute in input. Using default test query.')
             query = "Find single house building requirements in Antioch, CA."
         
-        llm = ChatOpenAI(
-            model=model_name,
-            base_url="https://openrouter.apify.actor/api/v1",
-            api_key="no-key-required-but-must-not-be-empty",
-            default_headers={"Authorization": f"Bearer {os.getenv('APIFY_TOKEN')}"}
-        )
+        graph = create_agent_graph(model_name)
+        startup_profiler.mark('agent-graph-created')
 
-        # Create the ReAct agent graph
-        # see https://langchain-ai.github.io/langgraph/reference/prebuilt/?h=react#langgraph.prebuilt.chat_agent_executor.create_react_agent
-        tools = [tool_research_building_code]
-        
-        # We might want to use a more generic output format or just the report directly.
-        # For now, let's keep it simple. The agent will use the tool and return the result.
-        # Since the tool returns a complex object (BCARequirementReport), we need to ensure the agent can handle it.
-        # Ideally, the agent should just return the result of the tool call if it answers the query.
-        
-        graph = create_react_agent(llm, tools)
+        if startup_profiler.installed:
+            await save_startup_profile()
 
-        inputs: dict = {'messages': [('user', query)]}
-        response_messages = []
-        
-        async for state in graph.astream(inputs, stream_mode='values'):
-            log_state(state)
-            response_messages = state['messages']
+        from langchain_core.messages import messages_to_dict
+
+        from src.utils import debug_payloads, log_state
+
+        # Full tool results are only written to the key-value store when asked for.
+        debug_payloads.enabled = actor_input.get('debugPayloads', False)
+        llm_cache.bypass = actor_input.get('bypassLlmCache', False)
+
+        result_checkpoint = checkpoint_key('result', model_name, query)
+        if await checkpoints.load(result_checkpoint):
+            Actor.log.info('The result was already delivered before the run restarted, nothing to do.')
+            return
+
+        graph_checkpoint = checkpoint_key('graph', model_name, query)
+        response_messages = await load_graph_messages(graph_checkpoint)
+        if response_messages and is_final_answer(response_messages[-1]):
+            Actor.log.info('Restored the final answer from checkpoint.')
+        else:
+            inputs: dict = {'messages': response_messages or [('user', query)]}
+
+            async for state in graph.astream(inputs, stream_mode='values'):
+                log_state(state)
+                await debug_payloads.flush()
+                response_messages = state['messages']
+                await checkpoints.save(graph_checkpoint, messages_to_dict(response_messages))
 
         last_message = response_messages[-1]
         
@@ -80,8 +156,14 @@ async def main() -> None:
             await Actor.fail(status_message='Failed to get a response from the ReAct agent!')
             return
 
-        # Charge for task completion
-        await Actor.charge('task-completed')
+        # Charge for task completion, at most once per query: the charge is checkpointed before it is made,
+        # so a migration right after charging does not charge again on restart.
+        charge_checkpoint = checkpoint_key('charged', model_name, query)
+        if await checkpoints.load(charge_checkpoint):
+            Actor.log.info('Task completion was already charged before the run restarted.')
+        else:
+            await checkpoints.save(charge_checkpoint, True)
+            await Actor.charge('task-completed')
 
         # Push results to the key-value store and dataset
         store = await Actor.open_key_value_store()
@@ -99,3 +181,4 @@ async def main() -> None:
             }
         )
         Actor.log.info('Pushed the data into the dataset!')
+        await checkpoints.save(result_checkpoint, True)
@@ -13,6 +13,7 @@ class BuildingCodeRequirement(BaseModel):
     requirement: str                  # plain-language requirement
     applicability: Optional[str]      # e.g. "R-2 Occupancy", "Zones R1"
     notes: Optional[str] = None       # clarifications, assumptions
+    sources: List[str]                # URLs of the pages the requirement was found on
 
 
 class BuildingCodeReport(BaseModel):
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import builtins
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Captured as early as possible so phase timings are relative to process start.
+_PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """
+    Records per-module import times and named startup phases.
+
+    Import timing works like `python -X importtime`: `builtins.__import__` is wrapped
+    and every module that was not yet in `sys.modules` gets its inclusive (cumulative)
+    and self time recorded. Install it as early as possible to cover the most imports.
+    """
+
+    def __init__(self) -> None:
+        self._original_import = None
+        self._stack: List[List[float]] = []
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self.phases: List[Dict[str, float]] = []
+
+    @property
+    def installed(self) -> bool:
+        return self._original_import is not None
+
+    def install(self) -> None:
+        if self.installed:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._profiled_import
+        self.mark("profiler-installed")
+
+    def uninstall(self) -> None:
+        if not self.installed:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+
+    def _profiled_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # Accumulator for time spent in nested (child) imports.
+        self._stack.append([0.0])
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()[0]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            if name not in self.imports:
+                self.imports[name] = {
+                    "cumulative_ms": round(elapsed * 1000, 3),
+                    "self_ms": round((elapsed - children) * 1000, 3),
+                }
+
+    def mark(self, phase: str) -> None:
+        """Record a named startup phase, relative to process start."""
+        self.phases.append({
+            "phase": phase,
+            "at_ms": round((time.perf_counter() - _PROCESS_START) * 1000, 3),
+        })
+
+    def report(self, top: Optional[int] = 25) -> dict:
+        """Return the profile as a JSON-serializable dict, slowest imports first."""
+        ranked = sorted(self.imports.items(), key=lambda kv: kv[1]["cumulative_ms"], reverse=True)
+        if top is not None:
+            ranked = ranked[:top]
+        return {
+            "total_ms": round((time.perf_counter() - _PROCESS_START) * 1000, 3),
+            "phases": list(self.phases),
+            "imported_modules": len(self.imports),
+            "imports": [{"module": name, **timing} for name, timing in ranked],
+        }
+
+    def format_report(self, top: int = 15) -> str:
+        report = self.report(top=top)
+        lines = [f"Startup profile: {report['total_ms']:.1f} ms total, {report['imported_modules']} modules imported"]
+        for phase in report["phases"]:
+            lines.append(f"  phase {phase['phase']:<24} at {phase['at_ms']:>10.1f} ms")
+        for entry in report["imports"]:
+            lines.append(
+                f"  import {entry['module']:<40} {entry['cumulative_ms']:>10.1f} ms (self {entry['self_ms']:.1f} ms)"
+            )
+        return "\n".join(lines)
+
+
+# Process-wide profiler. Inactive until `install()` is called.
+startup_profiler = StartupProfiler()
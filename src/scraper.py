@@ -3,16 +3,35 @@ from __future__ import annotations
 import asyncio
 import os
 import logging
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-from playwright.async_api import async_playwright
-from openai import OpenAI
 from apify import Actor
-
+from pydantic import ValidationError
+
+from src.adapters import SiteAdapter, get_site_adapter, task_keywords
+from src.checkpoint import checkpoint_key, checkpoints
+from src.content import ContentStore, PageContent, extract_text
+from src.dedup import merge_requirements
+from src.fanout import FanOutController
+from src.llm_cache import cache_key, distill_page_state, llm_cache
+from src.sessions import dismiss_consent, domain_sessions
 from src.models import BuildingCodeReport, BuildingCodeRequirement
+from src.utils import Truncated, step_log_sampler
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
-# OpenAI client initialization (lazy)
-# client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# playwright and openai are imported on first use, see `WebScraperActor.get_browser` and `get_openai_client`.
+
+# Characters of raw HTML kept between steps for the LLM to choose the next action from.
+PAGE_SNAPSHOT_CHARS = 8000
+# Characters of aggregated page text sent to the summarizer.
+SUMMARY_INPUT_CHARS = 15000
+# Search hits requested; they are ranked and opened progressively, see `FanOutController`.
+SEARCH_MAX_RESULTS = 8
+# Sections fetched per tab when a site adapter handles the start URL.
+ADAPTER_MAX_SECTIONS = 3
 
 ALLOWED_ACTIONS = """
 You may ONLY respond with exactly ONE of the following actions (no explanation):
@@ -54,11 +73,14 @@ class WebScraperActor:
     _browser = None
     _playwright = None
     _lock = asyncio.Lock()
+    # Research runs currently using the browser, see `run_research_agent`
+    active_runs = 0
 
     @classmethod
     async def get_browser(cls):
         async with cls._lock:
             if cls._playwright is None:
+                from playwright.async_api import async_playwright
                 cls._playwright = await async_playwright().start()
             if cls._browser is None:
                 try:
@@ -89,41 +111,84 @@ class WebScraperActor:
         cls._browser = None
         cls._playwright = None
 
+    @classmethod
+    def open_page_count(cls) -> int:
+        if cls._browser is None:
+            return 0
+        return sum(len(ctx.pages) for ctx in cls._browser.contexts)
+
     @staticmethod
-    async def new_page():
+    async def new_page(url: Optional[str] = None):
         browser = await WebScraperActor.get_browser()
-        # Create a new context for isolation if needed, or just new page
-        ctx = await browser.new_context()
+        # Each tab gets its own context, seeded with the saved session (cookies, localStorage) of the
+        # domain it starts on; hand it back with `close_page` so the session is saved for the next tab.
+        storage_state = await domain_sessions.storage_state(url) if url else None
+        ctx = await browser.new_context(storage_state=storage_state)
         page = await ctx.new_page()
         return page, ctx
 
-async def llm_choose_action(current_html: str, history: List[str], user_task: str) -> str:
+    @staticmethod
+    async def close_page(page, ctx, start_url: Optional[str] = None):
+        try:
+            # Only the sessions of the domains the tab started and ended on are kept
+            urls = [start_url, page.url if page else None]
+            if page: await page.close()
+            if ctx:
+                await domain_sessions.save(ctx, urls)
+                await ctx.close()
+        except Exception as e:
+            Actor.log.debug("Failed to close page: %s", e)
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> AsyncOpenAI:
     """
-    Ask gpt-4o-mini to choose the next agent action.
+    Return the OpenRouter client shared by all LLM calls.
+    Created once, on first use, instead of on every call.
+    Async, so that an LLM call in one tab does not block the other tabs.
+    LLM_BASE_URL overrides the endpoint, e.g. with a local stand-in for load tests.
     """
-    html_snippet = current_html[:8000]  # keep it within reasonable token budget
-    history_text = "\n".join(history[-10:])  # last 10 actions
-    
     from apify import Configuration
+    from openai import AsyncOpenAI
+
     token = Configuration.get_global_configuration().token
 
-    client = OpenAI(
-        base_url="https://openrouter.apify.actor/api/v1",
+    return AsyncOpenAI(
+        base_url=os.getenv("LLM_BASE_URL", "https://openrouter.apify.actor/api/v1"),
         api_key="no-key-required-but-must-not-be-empty",
         default_headers={"Authorization": f"Bearer {token}"}
     )
 
+async def llm_choose_action(current_html: str, history: List[str], user_task: str) -> str:
+    """
+    Ask gpt-4o-mini to choose the next agent action.
+    Responses are cached by task, history and distilled page state, see `src.llm_cache`.
+    """
+    html_snippet = current_html[:PAGE_SNAPSHOT_CHARS]  # keep it within reasonable token budget
+    history_text = "\n".join(history[-10:])  # last 10 actions
+
+    model = "gpt-4o-mini"
+    temperature = 0.1
+    messages = [
+        {"role": "system", "content": AGENT_SYSTEM_PROMPT},
+        {"role": "user", "content": f"USER TASK: {user_task}"},
+        {
+            "role": "assistant",
+            "content": f"RECENT ACTIONS:\n{history_text if history_text else '(none)'}",
+        },
+    ]
+    key = cache_key(model, temperature, messages, distill_page_state(html_snippet))
+    if llm_cache.cacheable(temperature):
+        cached = await llm_cache.get(key)
+        if cached:
+            return cached
+
+    client = get_openai_client()
+
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.1,
-            messages=[
-                {"role": "system", "content": AGENT_SYSTEM_PROMPT},
-                {"role": "user", "content": f"USER TASK: {user_task}"},
-                {
-                    "role": "assistant",
-                    "content": f"RECENT ACTIONS:\n{history_text if history_text else '(none)'}",
-                },
+        resp = await client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages + [
                 {
                     "role": "assistant",
                     "content": f"CURRENT PAGE HTML (truncated):\n{html_snippet}",
@@ -131,6 +196,8 @@ async def llm_choose_action(current_html: str, history: List[str], user_task: st
             ],
         )
         action = resp.choices[0].message.content.strip()
+        if llm_cache.cacheable(temperature):
+            await llm_cache.put(key, action)
         return action
     except Exception as e:
         Actor.log.error(f"LLM API error: {e}")
@@ -139,7 +206,7 @@ async def llm_choose_action(current_html: str, history: List[str], user_task: st
 
 async def perform_search_get_urls(user_task: str) -> List[str]:
     """
-    Uses apify/rag-web-browser to search and returns the top 3 result URLs.
+    Uses apify/rag-web-browser to search and returns the top SEARCH_MAX_RESULTS result URLs.
     """
     Actor.log.info(f"Searching for task: {user_task}")
     search_query = f"{user_task} building code official site"
@@ -149,7 +216,7 @@ async def perform_search_get_urls(user_task: str) -> List[str]:
             "apify/rag-web-browser",
             run_input={
                 "query": search_query,
-                "maxResults": 3,
+                "maxResults": SEARCH_MAX_RESULTS,
             },
             memory_mbytes=2048,
         )
@@ -174,33 +241,122 @@ async def perform_search_get_urls(user_task: str) -> List[str]:
         Actor.log.error(f"Search failed: {e}")
         return []
 
-async def run_single_agent_tab(url: str, user_task: str, max_steps: int = 15) -> str:
+async def page_snapshot(page) -> str:
+    """
+    Returns the head of the page HTML for the next LLM decision.
+    Only this bounded prefix is kept between steps, never the full page.
+    Cookie-consent banners are dismissed first so the agent never spends a step on them.
+    """
+    await dismiss_consent(page)
+    return (await page.content())[:PAGE_SNAPSHOT_CHARS]
+
+async def extract_page(page, store: ContentStore) -> Optional[PageContent]:
+    """
+    Extracts the current page into `store` as bounded, compressed text.
+    """
+    await dismiss_consent(page)
+    return store.add(page.url, await page.content())
+
+async def run_site_adapter(adapter: SiteAdapter, page, user_task: str, store: ContentStore) -> List[PageContent]:
+    """
+    Researches a known code-hosting platform without LLM steps:
+    search the code for the task keywords (or rank its table of contents if search finds nothing)
+    and fetch the best matching sections, each stored under its own URL.
+    Returns an empty list if nothing relevant was found, so the caller can fall back to the LLM loop.
+    """
+    code_url = page.url
+    keywords = task_keywords(user_task)
+    if not keywords:
+        return []
+
+    sections = await adapter.search_sections(page, code_url, " ".join(keywords))
+    if not sections:
+        sections = await adapter.list_chapters(page, code_url)
+    ranked = sorted(
+        (s for s in sections if s.score(keywords) > 0), key=lambda s: s.score(keywords), reverse=True
+    )[:ADAPTER_MAX_SECTIONS]
+    Actor.log.info(f"[{adapter.name}] Matched sections: {[s.title for s in ranked]}")
+
+    contents = []
+    for section in ranked:
+        html = await adapter.fetch_section(page, section.url)
+        if html:
+            text, truncated = extract_text(html, store.page_limit // ADAPTER_MAX_SECTIONS)
+            content = store.add_text(section.url, f"## {section.title}\n{text}", truncated)
+            if content:
+                contents.append(content)
+    return contents
+
+async def run_single_agent_tab(url: str, user_task: str, store: ContentStore, max_steps: int = 15) -> List[PageContent]:
     """
     Spawns a new page, navigates to the start URL, and runs the ReAct agent loop.
-    Returns the extracted Markdown/HTML content.
+    Returns references to the extracted content in `store` (one per page or code section), empty on failure.
+    Progress (visited URLs, action history, extracted content) is checkpointed after every step,
+    so a migrated or restarted run resumes the tab where it stopped.
     """
     Actor.log.info(f"Starting agent tab for URL: {url}")
+    checkpoint_id = checkpoint_key("tab", user_task, url)
+    state = await checkpoints.load(checkpoint_id) or {}
+    if state.get("done"):
+        Actor.log.info(f"[{url}] Restored finished tab from checkpoint.")
+        restored = (store.add_text(c["url"], c["text"], c.get("truncated", False)) for c in state.get("contents", []))
+        return [content for content in restored if content]
+
+    async def finish(*contents: Optional[PageContent]) -> List[PageContent]:
+        found = [content for content in contents if content]
+        await checkpoints.save(checkpoint_id, {
+            "done": True,
+            "contents": [{"url": c.url, "text": c.text(), "truncated": c.truncated} for c in found],
+        })
+        return found
+
     page = None
     context = None
+    step_log_sampler.tab_started()
     try:
-        page, context = await WebScraperActor.new_page()
+        page, context = await WebScraperActor.new_page(url)
+
+        history: List[str] = state.get("history", [])
+        visited: List[str] = state.get("visited", [])
+        start_url = state.get("current_url") or url
+        if history:
+            Actor.log.info(f"[{url}] Resuming from checkpoint after step {len(history)} at {start_url}")
         
         # Initial navigation
         try:
-            await page.goto(url, wait_until="load", timeout=60000)
+            await page.goto(start_url, wait_until="load", timeout=60000)
             await page.wait_for_timeout(2000)
         except Exception as e:
-            Actor.log.error(f"Failed to load start URL {url}: {e}")
-            return ""
-
-        history: List[str] = []
-        html = await page.content()
-
-        for step in range(1, max_steps + 1):
+            Actor.log.error(f"Failed to load start URL {start_url}: {e}")
+            return []
+
+        # Known code-hosting platforms are navigated deterministically
+        adapter = get_site_adapter(page.url) if not history else None
+        if adapter:
+            try:
+                contents = await run_site_adapter(adapter, page, user_task, store)
+            except Exception as e:
+                Actor.log.warning(f"[{url}] {adapter.name} adapter failed: {e}")
+                contents = []
+            if contents:
+                return await finish(*contents)
+            Actor.log.info(f"[{url}] {adapter.name} adapter found nothing, falling back to the LLM loop.")
+            try:
+                await page.goto(url, wait_until="load", timeout=60000)
+            except Exception as e:
+                # Keep going from wherever the adapter left the page
+                Actor.log.warning(f"[{url}] Failed to return to the start URL: {e}")
+
+        html = await page_snapshot(page)
+
+        for step in range(len(history) + 1, max_steps + 1):
              # Decide action
             action = await llm_choose_action(html, history, user_task)
             history.append(action)
-            Actor.log.info(f"[{url}] Agent Step {step} Action: {action}")
+            if step_log_sampler.should_log(step):
+                Actor.log.info("[%s] Agent Step %d Action: %s", url, step, Truncated(action, 200))
+            else:
+                Actor.log.debug("[%s] Agent Step %d Action: %s", url, step, Truncated(action, 200))
             
             upper = action.upper().strip()
 
@@ -219,53 +375,56 @@ async def run_single_agent_tab(url: str, user_task: str, max_steps: int = 15) ->
                 try:
                     await page.goto(raw_url, wait_until="load", timeout=30000)
                     await page.wait_for_timeout(1000)
-                    html = await page.content()
+                    html = await page_snapshot(page)
                 except Exception as e:
                     Actor.log.warning(f"[{url}] Nav failed: {e}")
-                continue
 
-            if upper.startswith("CLICK "):
+            elif upper.startswith("CLICK "):
                 selector = action[len("CLICK "):].strip()
                 try:
                     await page.click(selector, timeout=5000)
                     await page.wait_for_timeout(1000)
-                    html = await page.content()
+                    html = await page_snapshot(page)
                 except Exception as e:
                     Actor.log.warning(f"[{url}] Click failed: {e}")
-                continue
 
-            if "EXTRACT" in upper:
+            elif "EXTRACT" in upper:
                 Actor.log.info(f"[{url}] EXTRACT issued. Capturing content.")
-                # We could try to convert to markdown here if we want, or just return HTML.
-                # For consistency with parallel search, let's keep HTML for now and let summarizer handle it? 
-                # Actually, the new summarizer expects Markdown-ish content.
-                # Let's return the HTML; the summarizer handles HTML snippet or Markdown.
-                return f"--- START SOURCE: {page.url} ---\n{html}\n--- END SOURCE ---\n"
+                return await finish(await extract_page(page, store))
 
-            if "FINISH" in upper:
+            elif "FINISH" in upper:
                 Actor.log.info(f"[{url}] FINISH issued.")
                 # Return what we have currently
-                return f"--- START SOURCE: {page.url} ---\n{html}\n--- END SOURCE ---\n"
+                return await finish(await extract_page(page, store))
+
+            if page.url not in visited:
+                visited.append(page.url)
+            await checkpoints.save(checkpoint_id, {
+                "history": history,
+                "visited": visited,
+                "current_url": page.url,
+            })
 
         # Max steps
         Actor.log.warning(f"[{url}] Max steps reached.")
-        return f"--- START SOURCE: {page.url} ---\n{html}\n--- END SOURCE ---\n"
+        return await finish(await extract_page(page, store))
 
     except Exception as e:
         Actor.log.error(f"[{url}] Agent tab crashed: {e}")
-        return ""
+        return []
     finally:
-        if page: await page.close()
-        if context: await context.close()
+        step_log_sampler.tab_finished()
+        await WebScraperActor.close_page(page, context, url)
 
-def summarize_requirements(html: str, user_task: str) -> BuildingCodeReport:
+async def summarize_requirements(html: str, user_task: str, system_prompt: Optional[str] = None) -> BuildingCodeReport:
     """
     Takes the final HTML retrieved by the agent and returns
     a structured BuildingCodeReport using gpt-4o-mini.
+    `system_prompt` replaces the generic prompt, e.g. with a jurisdiction plugin's own.
     """
-    html_snippet = html[:15000]  # keep under token limits
+    html_snippet = html[:SUMMARY_INPUT_CHARS]  # keep under token limits
 
-    system_prompt = """
+    system_prompt = system_prompt or """
 You are an expert in building codes and zoning regulations.
 
     You will be given:
@@ -276,6 +435,7 @@ You are an expert in building codes and zoning regulations.
     - Identify the key code requirements relevant to the task.
     - Summarise the requirements in clear, non-legal language.
     - Extract generic code references (Section, Chapter, Table numbers) and Source URLs.
+    - List in each requirement's `sources` the Source URL(s) it was found on.
     
     You MUST:
     - Fill the BuildingCodeReport schema.
@@ -290,27 +450,39 @@ You are an expert in building codes and zoning regulations.
     Content (Markdown):
     \"\"\"{html_snippet}\"\"\"
     """
-    
-    from apify import Configuration
-    token = Configuration.get_global_configuration().token
 
-    client = OpenAI(
-        base_url="https://openrouter.apify.actor/api/v1",
-        api_key="no-key-required-but-must-not-be-empty",
-        default_headers={"Authorization": f"Bearer {token}"}
-    )
+    model = "gpt-4o-mini"
+    temperature = 0.2
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    # The full schema is part of the key, so a schema change never serves records of the old shape
+    key = cache_key(model, temperature, messages, response_format=BuildingCodeReport.model_json_schema())
+    if llm_cache.cacheable(temperature):
+        cached = await llm_cache.get(key)
+        if cached:
+            try:
+                return BuildingCodeReport.model_validate(cached)
+            except ValidationError as e:
+                # Treated as a miss, the fresh response below replaces the record
+                Actor.log.warning(f"Ignoring invalid cached summary: {e}")
+
+    client = get_openai_client()
 
     try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            temperature=0.2,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+        completion = await client.beta.chat.completions.parse(
+            model=model,
+            temperature=temperature,
+            messages=messages,
             response_format=BuildingCodeReport,
         )
-        return completion.choices[0].message.parsed
+        report = completion.choices[0].message.parsed
+        if report is None:
+            raise ValueError(f"no parsed report (refusal: {completion.choices[0].message.refusal})")
+        if llm_cache.cacheable(temperature):
+            await llm_cache.put(key, report.model_dump())
+        return report
     except Exception as e:
         Actor.log.error(f"Error in summarization: {e}")
         return BuildingCodeReport(
@@ -321,30 +493,79 @@ You are an expert in building codes and zoning regulations.
             requirements=[]
         )
 
-async def run_research_agent(user_task: str, max_steps: int = 15) -> BuildingCodeReport:
+async def run_research_agent(
+    user_task: str, max_steps: int = 15, start_urls: Optional[List[str]] = None
+) -> BuildingCodeReport:
     """
     High-level entry:
-    1) Search to get candidate URLs.
-    2) Run multiple agent tabs in parallel to navigate/extract.
+    1) If a jurisdiction plugin handles the task, fetch its code pages directly.
+    2) Otherwise search to get candidate URLs (or use `start_urls`) and run agent tabs over the ranked hits,
+       progressively, until the task is covered.
     3) Summarise aggregated content.
+    Several research runs can share the browser concurrently; it is closed when the last one finishes.
     """
-    # 1. Search (fast)
-    urls = await perform_search_get_urls(user_task)
-    if not urls:
-         # Fallback search if Rag fails?
-         urls = ["https://www.google.com/search?q=" + user_task.replace(" ", "+")]
-
-    # Limit to top 3 to avoid overloading browser memory
-    urls = urls[:3]
-    Actor.log.info(f"Parallel Agents launching for: {urls}")
-
-    # 2. Run Parallel Agents
-    tasks = [run_single_agent_tab(url, user_task, max_steps) for url in urls]
-    results = await asyncio.gather(*tasks)
-    
-    # Filter empty results
-    valid_results = [r for r in results if r]
-    aggregated_markdown = "\n\n".join(valid_results)
+    WebScraperActor.active_runs += 1
+    try:
+        return await _research(user_task, max_steps, start_urls)
+    finally:
+        WebScraperActor.active_runs -= 1
+        if not WebScraperActor.active_runs:
+            # Cleanup browser
+            await WebScraperActor.close()
+
+async def _research(user_task: str, max_steps: int, start_urls: Optional[List[str]]) -> BuildingCodeReport:
+    from src.jurisdictions import find_jurisdiction_plugin
+
+    report_checkpoint = checkpoint_key("report", user_task)
+    saved_report = await checkpoints.load(report_checkpoint)
+    if saved_report:
+        Actor.log.info("Restored research report from checkpoint.")
+        return BuildingCodeReport.model_validate(saved_report)
+
+    store = ContentStore()
+    try:
+        valid_results: List[PageContent] = []
+        system_prompt = None
+
+        # 1. Known jurisdiction (deterministic, no LLM steps)
+        plugin = find_jurisdiction_plugin(user_task)
+        if plugin:
+            Actor.log.info(f"Using the {plugin.name} jurisdiction plugin.")
+            try:
+                valid_results = await plugin.collect(user_task, store)
+            except Exception as e:
+                Actor.log.error(f"{plugin.name} plugin failed: {e}")
+            if valid_results:
+                system_prompt = plugin.summary_prompt
+            else:
+                Actor.log.warning(f"{plugin.name} plugin found nothing, falling back to search.")
+
+        if not valid_results:
+            # 2a. Search (fast). The hits are checkpointed: a resumed run neither pays for a new search
+            # nor gets different URLs, which would orphan the tab checkpoints keyed by URL.
+            search_checkpoint = checkpoint_key("search", user_task)
+            urls = start_urls or await checkpoints.load(search_checkpoint)
+            if urls and not start_urls:
+                Actor.log.info("Restored search results from checkpoint.")
+            if not urls:
+                urls = await perform_search_get_urls(user_task)
+                if urls:
+                    await checkpoints.save(search_checkpoint, urls)
+            if not urls:
+                 # Fallback search if Rag fails?
+                 urls = ["https://www.google.com/search?q=" + user_task.replace(" ", "+")]
+
+            # 2b. Run agent tabs progressively over the ranked hits until the task is covered
+            Actor.log.info(f"Agent tabs candidates: {urls}")
+            controller = FanOutController(
+                user_task, lambda url: run_single_agent_tab(url, user_task, store, max_steps)
+            )
+            valid_results = await controller.run(urls)
+
+        aggregated_markdown = store.render(valid_results, SUMMARY_INPUT_CHARS)
+    finally:
+        # Also on failure, so spilled page bodies never outlive the run
+        store.close()
 
     if not aggregated_markdown:
         Actor.log.warning("All parallel agents failed to retrieve content.")
@@ -358,9 +579,14 @@ async def run_research_agent(user_task: str, max_steps: int = 15) -> BuildingCod
 
     # 3. Summarize
     Actor.log.info("Aggregated content retrieved. Summarizing...")
-    report = summarize_requirements(aggregated_markdown, user_task)
-    
-    # Cleanup browser
-    await WebScraperActor.close()
+    report = await summarize_requirements(aggregated_markdown, user_task, system_prompt)
+    if report.requirements:
+        # The same section often comes back from several sources
+        report.requirements = merge_requirements(report.requirements)
+        # Failed summaries are not checkpointed, a resumed run should retry them
+        await checkpoints.save(report_checkpoint, report.model_dump())
     
+    await llm_cache.flush()
+    Actor.log.info(f"LLM cache: {llm_cache.hits} hits, {llm_cache.misses} misses.")
+
     return report
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import re
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from apify import Actor
+
+# Named key-value store holding per-domain browser storage state, shared across runs.
+SESSION_STORE = "browser-sessions"
+
+# Second-level suffixes under which the registrable domain has three labels (example.com.au, example.co.uk).
+_SECOND_LEVEL_SUFFIXES = {"com", "net", "org", "gov", "edu", "co", "ac", "govt", "nsw", "vic", "qld", "wa", "sa", "tas", "act", "nt"}
+# US locality domains (RFC 1480): "antioch.ca.us" is a city, and "ci.antioch.ca.us" / "co.contra-costa.ca.us"
+# put a designator in front of the locality name.
+_US_LOCALITY_DESIGNATORS = {
+    "ci", "co", "city", "town", "vil", "twp", "county", "k12", "cc", "tec", "lib", "mus", "state", "dst", "cog", "gen",
+}
+
+# Buttons of the common consent-management platforms (OneTrust, Cookiebot, Didomi, Quantcast, TrustArc, Osano,
+# CookieYes, Civic, Termly, ...).
+CONSENT_SELECTORS: List[str] = [
+    "#onetrust-accept-btn-handler",
+    "#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll",
+    "#CybotCookiebotDialogBodyButtonAccept",
+    "#didomi-notice-agree-button",
+    ".qc-cmp2-summary-buttons button[mode='primary']",
+    "#truste-consent-button",
+    ".osano-cm-accept-all",
+    ".cky-btn-accept",
+    "#ccc-recommended-settings",
+    "[data-tid='banner-accept']",
+    ".cc-btn.cc-allow",
+    ".cc-btn.cc-dismiss",
+]
+# Fallback: a (non-link) button with one of these labels inside a container named after cookies or consent.
+# "cmp" must be a whole class name: AEM Core Components use cmp-* classes all over many .gov sites.
+CONSENT_BUTTON_TEXT_RE = r"^(accept( all)?( cookies)?|allow( all)?( cookies)?|i agree|agree|got it|i understand)$"
+CONSENT_CONTAINER_RE = r"cookie|consent|gdpr|cc-window|(^|\s)cmp(\s|$)"
+# Session cookies (no expiry) are dropped this long after they were first saved.
+SESSION_COOKIE_TTL = 24 * 3600
+
+_DISMISS_CONSENT_JS = """
+([selectors, textPattern, containerPattern]) => {
+    const visible = (el) => {
+        const rect = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el && visible(el)) { el.click(); return selector; }
+    }
+    const textRe = new RegExp(textPattern, 'i');
+    const containerRe = new RegExp(containerPattern, 'i');
+    for (const el of document.querySelectorAll('button, input[type=button], input[type=submit], [role=button]:not(a)')) {
+        const label = (el.innerText || el.value || '').trim();
+        if (!label || label.length > 40 || !textRe.test(label) || !visible(el)) continue;
+        for (let node = el.parentElement; node && node !== document.body; node = node.parentElement) {
+            if (containerRe.test((node.id || '') + ' ' + (node.className || '') + ' ' + (node.getAttribute('aria-label') || ''))) {
+                el.click();
+                return label;
+            }
+        }
+    }
+    return null;
+}
+"""
+
+
+def registrable_domain(url_or_host: str) -> str:
+    """Approximate registrable domain, e.g. "https://library.municode.com/ca" -> "municode.com",
+    "ncc.abcb.gov.au" -> "abcb.gov.au", "www.ci.antioch.ca.us" -> "ci.antioch.ca.us"."""
+    host = urlparse(url_or_host).hostname if "//" in url_or_host else url_or_host
+    host = (host or "").lower().lstrip(".").strip("[]")
+    try:
+        # IP addresses are their own domain
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        pass
+    labels = host.split(".")
+    if len(labels) >= 3 and labels[-1] == "us" and len(labels[-2]) == 2:
+        if len(labels) >= 4 and labels[-4] in _US_LOCALITY_DESIGNATORS:
+            return ".".join(labels[-4:])
+        return ".".join(labels[-3:])
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_SUFFIXES and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _cookie_id(cookie: dict) -> str:
+    return f'{cookie["name"]}|{cookie.get("domain")}|{cookie.get("path")}'
+
+
+def _live_cookies(cookies: List[dict], first_seen: Optional[Dict[str, float]] = None) -> List[dict]:
+    """
+    `cookies` without the expired ones. Session cookies (`expires` -1) are kept for SESSION_COOKIE_TTL
+    from when they were first saved, as recorded in `first_seen`.
+    """
+    now = time.time()
+    first_seen = first_seen or {}
+
+    def live(cookie: dict) -> bool:
+        if cookie.get("expires", -1) >= 0:
+            return cookie["expires"] > now
+        return now - first_seen.get(_cookie_id(cookie), now) < SESSION_COOKIE_TTL
+
+    return [c for c in cookies if live(c)]
+
+
+async def dismiss_consent(page) -> Optional[str]:
+    """Click away a cookie-consent banner if one is showing. Returns what was clicked, or None."""
+    try:
+        clicked = await page.evaluate(
+            _DISMISS_CONSENT_JS, [CONSENT_SELECTORS, CONSENT_BUTTON_TEXT_RE, CONSENT_CONTAINER_RE]
+        )
+    except Exception:
+        return None
+    if clicked:
+        Actor.log.debug("Dismissed consent banner on %s via %s", page.url, clicked)
+        await page.wait_for_timeout(300)
+    return clicked
+
+
+class DomainSessions:
+    """
+    Browser storage state (cookies and localStorage) per registrable domain.
+
+    New browser contexts are seeded with the state of the domain they start on, and the state of a context
+    is merged back when it closes, so consent choices, redirects and anti-bot clearance are paid for once per
+    domain instead of once per tab. The state is also persisted in a named key-value store for later runs,
+    unless `persist` is unset.
+    """
+
+    def __init__(self) -> None:
+        self.persist = True
+        self._states: Dict[str, dict] = {}
+        self._store = None
+        self._lock = asyncio.Lock()
+
+    async def _open(self):
+        if self._store is None:
+            self._store = await Actor.open_key_value_store(name=SESSION_STORE)
+        return self._store
+
+    @staticmethod
+    def _record_key(domain: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9!\-_.'()]", "_", domain)
+
+    async def _state(self, domain: str) -> dict:
+        if domain not in self._states:
+            state = {}
+            if self.persist:
+                try:
+                    state = await (await self._open()).get_value(self._record_key(domain)) or {}
+                except Exception as e:
+                    Actor.log.warning(f"Failed to load browser session for {domain}: {e}")
+            self._states[domain] = state
+        return self._states[domain]
+
+    async def storage_state(self, url: str) -> Optional[dict]:
+        """Storage state to seed a new context starting on `url` with, if any is known."""
+        state = await self._state(registrable_domain(url))
+        cookies = _live_cookies(state.get("cookies", []), state.get("first_seen"))
+        origins = state.get("origins", [])
+        return {"cookies": cookies, "origins": origins} if cookies or origins else None
+
+    async def save(self, context, urls: List[str]) -> None:
+        """
+        Merge the storage state of `context` for the domains of `urls` (where the tab started and ended)
+        into the per-domain states and persist the changed ones. Cookies and storage of other domains
+        (third-party trackers, embeds) are not kept.
+        """
+        try:
+            state = await context.storage_state()
+        except Exception as e:
+            Actor.log.debug("Could not read storage state: %s", e)
+            return
+
+        domains = {registrable_domain(url) for url in urls if url and url.startswith("http")}
+        updates: Dict[str, dict] = {domain: {"cookies": [], "origins": []} for domain in domains}
+        for cookie in state.get("cookies", []):
+            domain = registrable_domain(cookie.get("domain", ""))
+            if domain in updates:
+                updates[domain]["cookies"].append(cookie)
+        for origin in state.get("origins", []):
+            domain = registrable_domain(origin.get("origin", ""))
+            if domain in updates:
+                updates[domain]["origins"].append(origin)
+
+        now = time.time()
+        async with self._lock:
+            for domain, update in updates.items():
+                if not update["cookies"] and not update["origins"]:
+                    continue
+                current = await self._state(domain)
+                first_seen = dict(current.get("first_seen", {}))
+                previous = {_cookie_id(c): c for c in current.get("cookies", [])}
+                cookies = dict(previous)
+                for cookie in update["cookies"]:
+                    cookie_id = _cookie_id(cookie)
+                    if cookie.get("expires", -1) < 0:
+                        if previous.get(cookie_id, {}).get("value") != cookie.get("value"):
+                            # A new or changed session cookie starts its TTL again
+                            first_seen[cookie_id] = now
+                        else:
+                            first_seen.setdefault(cookie_id, now)
+                    cookies[cookie_id] = cookie
+                live = _live_cookies(list(cookies.values()), first_seen)
+                live_ids = {_cookie_id(c) for c in live}
+                first_seen = {k: v for k, v in first_seen.items() if k in live_ids}
+                origins = {o["origin"]: o for o in current.get("origins", [])}
+                origins.update({o["origin"]: o for o in update["origins"]})
+                merged = {"cookies": live, "origins": list(origins.values()), "first_seen": first_seen}
+                if merged == current:
+                    continue
+                self._states[domain] = merged
+                if not self.persist:
+                    continue
+                try:
+                    await (await self._open()).set_value(self._record_key(domain), merged)
+                except Exception as e:
+                    Actor.log.warning(f"Failed to persist browser session for {domain}: {e}")
+
+
+domain_sessions = DomainSessions()
@@ -1,35 +1,129 @@
 from __future__ import annotations
 
+import logging
+from typing import Any, Dict, Optional
+
 from apify import Actor
-from langchain_core.messages import ToolMessage
+
+# Default number of characters of a payload that end up in a log line.
+DEFAULT_PREVIEW_CHARS = 500
+
+
+class Truncated:
+    """Lazily formatted, truncated view of a value, meant to be passed as a logging argument.
+
+    Nothing is formatted unless the record is actually emitted, so it costs nothing when the level is disabled.
+    """
+
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value: Any, limit: int = DEFAULT_PREVIEW_CHARS) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f'{text[:self.limit]}... [truncated, {len(text)} chars total]'
+
+
+class PayloadSink:
+    """Collects full debug payloads and writes them to the key-value store on demand.
+
+    Disabled by default. When enabled (`debugPayloads` input), log lines only carry a truncated preview and
+    the key of the record holding the full payload.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._pending: Dict[str, str] = {}
+        self._counter = 0
+
+    def capture(self, name: str, payload: Any) -> Optional[str]:
+        """Queue a payload for storage and return its key, or `None` if the sink is disabled."""
+        if not self.enabled:
+            return None
+        self._counter += 1
+        key = f'DEBUG_PAYLOAD_{self._counter:05d}_{name}'
+        self._pending[key] = payload if isinstance(payload, str) else repr(payload)
+        return key
+
+    async def flush(self) -> None:
+        """Write the queued payloads to the default key-value store and release them."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        store = await Actor.open_key_value_store()
+        for key, payload in pending.items():
+            await store.set_value(key, payload, content_type='text/plain')
+
+
+class StepLogSampler:
+    """Decides which per-step log lines are emitted at INFO.
+
+    With a single active agent tab every step is logged. Under load (several concurrent tabs) only the first
+    `first` steps and then every `every`-th step are, the rest go to DEBUG.
+    """
+
+    def __init__(self, first: int = 3, every: int = 5) -> None:
+        self.first = first
+        self.every = every
+        self.active = 0
+
+    def tab_started(self) -> None:
+        self.active += 1
+
+    def tab_finished(self) -> None:
+        self.active -= 1
+
+    def should_log(self, step: int) -> bool:
+        if self.active <= 1:
+            return True
+        return step <= self.first or step % self.every == 0
+
+
+debug_payloads = PayloadSink()
+step_log_sampler = StepLogSampler()
 
 
 def log_state(state: dict) -> None:
     """Log the state of the graph.
 
-    Uses the `Actor.log.debug` method to log the state of the graph.
+    Uses the `Actor.log.debug` method to log the state of the graph. Returns immediately unless debug logging is
+    enabled, and only logs truncated previews of message contents; full tool results are handed to
+    `debug_payloads`.
 
     Args:
         state: The state of the graph.
     """
+    if not Actor.log.isEnabledFor(logging.DEBUG):
+        return
+
+    # Imported here so the scraper can use the helpers above without loading LangChain.
+    from langchain_core.messages import ToolMessage
+
     message = state['messages'][-1]
     # Traverse all tool messages and print them
     # if multiple tools are called in parallel
     if isinstance(message, ToolMessage):
         # Until the analyst message with tool_calls
-        for _message in state['messages'][::-1]:
+        for _message in reversed(state['messages']):
             if hasattr(_message, 'tool_calls'):
                 break
             Actor.log.debug('-------- Tool Result --------')
             Actor.log.debug('Tool: %s', _message.name)
-            Actor.log.debug('Result: %s', _message.content)
+            Actor.log.debug('Result: %s', Truncated(_message.content))
+            payload_key = debug_payloads.capture('tool_result', _message.content)
+            if payload_key:
+                Actor.log.debug('Full result stored as: %s', payload_key)
 
     Actor.log.debug('-------- Message --------')
-    Actor.log.debug('Message: %s', message)
+    Actor.log.debug('Message: %s (%s)', type(message).__name__, Truncated(message.content))
 
     # Print all tool calls
     if hasattr(message, 'tool_calls'):
         for tool_call in getattr(message, 'tool_calls', []):
             Actor.log.debug('-------- Tool Call --------')
             Actor.log.debug('Tool: %s', tool_call['name'])
-            Actor.log.debug('Args: %s', tool_call['args'])
+            Actor.log.debug('Args: %s', Truncated(tool_call['args']))
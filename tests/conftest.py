@@ -0,0 +1,49 @@
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import pytest
+
+
+class FakeKeyValueStore:
+    """In-memory stand-in for the parts of the Apify key-value store the Actor uses."""
+
+    def __init__(self):
+        self.records: Dict[str, Any] = {}
+
+    async def get_value(self, key: str, default: Any = None) -> Any:
+        return self.records.get(key, default)
+
+    async def set_value(self, key: str, value: Any, content_type: Optional[str] = None) -> None:
+        self.records[key] = value
+
+    async def delete_value(self, key: str) -> None:
+        self.records.pop(key, None)
+
+    async def iterate_keys(self):
+        for key in list(self.records):
+            yield SimpleNamespace(key=key)
+
+
+class FakeActor:
+    """Replaces `Actor` in a module: named key-value stores in memory, logging to a plain logger."""
+
+    def __init__(self):
+        self.stores: Dict[Optional[str], FakeKeyValueStore] = {}
+        self.log = logging.getLogger("fake-actor")
+
+    async def open_key_value_store(self, name: Optional[str] = None) -> FakeKeyValueStore:
+        return self.stores.setdefault(name, FakeKeyValueStore())
+
+
+@pytest.fixture
+def fake_actor(monkeypatch):
+    """Returns a function that patches `Actor` in the given modules with one shared FakeActor."""
+    actor = FakeActor()
+
+    def install(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "Actor", actor)
+        return actor
+
+    return install
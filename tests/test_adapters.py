@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from src.adapters import (
+    CodeSection, ECode360Adapter, MunicodeAdapter, UpCodesAdapter, get_site_adapter, task_keywords,
+)
+from src.adapters.base import build_search_url
+
+
+def test_task_keywords_drops_generic_words_and_location():
+    assert task_keywords("Find stair requirements for a new house in Los Angeles") == ["stair", "house"]
+    assert task_keywords("Fence and fence height rules") == ["fence", "height"]
+
+
+def test_code_section_score_counts_keywords_in_title():
+    section = CodeSection(title="Sec. 9-5.301 Fences and walls", url="https://x")
+    assert section.score(["fence", "height"]) == 1
+    assert section.score(["fences", "walls"]) == 2
+    assert section.score(["parking"]) == 0
+
+
+@pytest.mark.parametrize("url, adapter", [
+    ("https://library.municode.com/ca/antioch/codes/code_of_ordinances", MunicodeAdapter),
+    ("https://up.codes/viewer/california/ca-building-code-2022", UpCodesAdapter),
+    ("https://ecode360.com/AN1234", ECode360Adapter),
+])
+def test_get_site_adapter(url, adapter):
+    assert isinstance(get_site_adapter(url), adapter)
+
+
+@pytest.mark.parametrize("url", ["https://notmunicode.com/ca", "https://www.antiochca.gov/", "https://up.codes.evil.com/"])
+def test_unknown_hosts_have_no_adapter(url):
+    assert get_site_adapter(url) is None
+
+
+def test_build_search_url():
+    assert build_search_url("https://x/search", "stair width") == "https://x/search?q=stair+width"
+    assert build_search_url("https://x/search?a=1", "fence", param="query") == "https://x/search?a=1&query=fence"
+
+
+def test_municode_search_url():
+    adapter = MunicodeAdapter()
+    url = "https://library.municode.com/ca/antioch/codes/code_of_ordinances?nodeId=TIT9PLZO"
+    assert adapter.search_url(url, "fence height") == (
+        "https://library.municode.com/ca/antioch/search?searchText=fence+height"
+    )
+    assert adapter.search_url("https://municode.com/", "fence") is None
+
+
+def test_upcodes_search_url():
+    adapter = UpCodesAdapter()
+    url = "https://up.codes/viewer/california/ca-building-code-2022/chapter/10/means-of-egress"
+    assert adapter.search_url(url, "stair") == "https://up.codes/viewer/california/ca-building-code-2022/search?q=stair"
+    assert adapter.search_url("https://up.codes/", "stair") == "https://up.codes/search?q=stair"
+
+
+def test_ecode360_search_url():
+    adapter = ECode360Adapter()
+    assert adapter.search_url("https://ecode360.com/AN1234", "fence") == "https://ecode360.com/AN1234/search?query=fence"
+    assert adapter.search_url("https://ecode360.com/12345678", "fence") is None
+
+
+class FakePage:
+    def __init__(self, links):
+        self.links = links
+
+    async def eval_on_selector_all(self, selector, script):
+        return self.links
+
+
+def test_links_keeps_matching_deduplicated_links_with_text():
+    page = FakePage([
+        ["https://ecode360.com/111#top", "Chapter 1   Fences"],
+        ["https://ecode360.com/111", "Chapter 1 Fences (again)"],
+        ["https://ecode360.com/222", ""],
+        ["https://ecode360.com/AN1234/search", "Search"],
+        ["https://ecode360.com/333", "Chapter 3 Parking"],
+    ])
+    adapter = ECode360Adapter()
+    sections = asyncio.run(adapter._links(page, adapter.section_link_re))
+    assert sections == [
+        CodeSection(title="Chapter 1 Fences", url="https://ecode360.com/111"),
+        CodeSection(title="Chapter 3 Parking", url="https://ecode360.com/333"),
+    ]
+    assert asyncio.run(adapter._links(page, None)) == []
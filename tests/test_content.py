@@ -0,0 +1,72 @@
+import os
+
+from src.content import ContentStore, extract_text
+
+
+def test_extract_text_keeps_structure_and_drops_scripts():
+    html = (
+        "<html><head><title>t</title><script>var x = 1;</script></head>"
+        "<body><h2>Section 101</h2><p>Stairs  shall be\n36 inches.</p><ul><li>One</li><li>Two</li></ul>"
+        "<style>.a{}</style></body></html>"
+    )
+    text, truncated = extract_text(html)
+    assert not truncated
+    assert "## Section 101" in text
+    assert "Stairs shall be 36 inches." in text
+    assert "- One" in text and "- Two" in text
+    assert "var x" not in text and ".a{}" not in text
+
+
+def test_extract_text_truncates_at_character_boundary():
+    text, truncated = extract_text("<p>" + "°" * 100 + "</p>", limit=11)
+    assert truncated
+    assert text.endswith("[content truncated]")
+    assert text.splitlines()[0] == "°" * 5
+
+
+def test_add_text_truncates_inside_multibyte_character():
+    store = ContentStore(page_limit=10)
+    item = store.add_text("u", "aaaaaaaaa°bbbb")
+    assert item.truncated
+    assert item.text() == "aaaaaaaaa"
+    assert "aaaaaaaaa" in store.render([item], 1000)
+
+
+def test_add_text_enforces_run_limit():
+    store = ContentStore(page_limit=100, run_limit=150)
+    first = store.add_text("a", "x" * 100)
+    second = store.add_text("b", "y" * 100)
+    assert first.size == 100
+    assert second.size == 50 and second.truncated
+    assert store.add_text("c", "z") is None
+
+
+def test_add_text_deduplicates_identical_content():
+    store = ContentStore()
+    first = store.add_text("u", "same text")
+    assert store.add_text("u", "same text") is first
+    assert store.used == first.size
+
+
+def test_large_content_spills_to_disk_and_close_removes_it():
+    store = ContentStore(spill_threshold=100)
+    item = store.add_text("u", os.urandom(2000).hex())
+    assert item.compressed is None and os.path.exists(item.path)
+    assert len(item.text()) == 4000
+    store.close()
+    assert not os.path.exists(item.path)
+
+
+def test_render_splits_budget_and_drops_duplicate_sections():
+    store = ContentStore()
+    shared = "Section 101.1 Stairs. " + "Minimum stair width is 36 inches. " * 10
+    a = store.add_text("https://a.example", shared + "\n\nSection 202 Parking. Two spaces per unit. " * 3)
+    b = store.add_text("https://b.example", shared)
+    rendered = store.render([a, b], 400)
+    assert rendered.startswith("--- START SOURCE: https://a.example ---")
+    assert "https://b.example" not in rendered
+    assert len(rendered) < 600
+
+
+def test_render_without_contents_is_empty():
+    assert ContentStore().render([], 1000) == ""
@@ -0,0 +1,75 @@
+from src.content import extract_text
+from src.dedup import deduplicate_sources, merge_requirements, normalize_reference, split_sections
+from src.models import BuildingCodeRequirement
+
+
+def requirement(text, reference="CBC Section R311.7.5", category="Stairs", sources=()):
+    return BuildingCodeRequirement(
+        category=category, code_reference=reference, requirement=text, applicability=None, sources=list(sources),
+    )
+
+
+def test_normalize_reference():
+    assert normalize_reference("California Building Code 2022, Section 1011.2") == "cbc 1011.2"
+    assert normalize_reference("CBC §1011.2") == "cbc 1011.2"
+    assert normalize_reference("Chapter 10") != normalize_reference("Section 10")
+    assert normalize_reference("Ch. 10") == normalize_reference("Chapter 10")
+
+
+def test_normalize_reference_keeps_section_numbers_that_look_like_years():
+    assert normalize_reference("CBC Section 1905.1") == "cbc 1905.1"
+    assert normalize_reference("CBC Section 2003.1") == "cbc 2003.1"
+    assert normalize_reference("IBC 1907.1") == "ibc 1907.1"
+    assert normalize_reference("2022 CBC Section 2003") == "cbc 2003"
+    assert normalize_reference("IBC 1907") == "ibc 1907"
+    assert normalize_reference("CBC (2019 edition) 1905.1") == "cbc 1905.1"
+    assert len({normalize_reference(r) for r in ["CBC 1905.1", "CBC 2003.1", "CBC 1011.2"]}) == 3
+
+
+def test_merge_keeps_distinct_requirements_citing_the_same_section():
+    merged = merge_requirements([
+        requirement("Maximum riser height is 7 3/4 inches."),
+        requirement("Minimum tread depth is 10 inches."),
+    ])
+    assert [r.requirement for r in merged] == ["Maximum riser height is 7 3/4 inches.", "Minimum tread depth is 10 inches."]
+
+
+def test_merge_combines_near_duplicates_and_their_sources():
+    merged = merge_requirements([
+        requirement("Maximum riser height is 7 3/4 inches.", sources=["https://a"]),
+        requirement("Maximum riser height is 7-3/4 inches", reference="CBC §R311.7.5", sources=["https://b", "https://a"]),
+    ])
+    assert len(merged) == 1
+    assert merged[0].sources == ["https://a", "https://b"]
+
+
+def test_deduplicate_sources_drops_repeated_sections():
+    body = "Section 101.1 Stairs. " + "Minimum stair width is 36 inches in every dwelling unit. " * 5
+    sources = deduplicate_sources([("https://a", body), ("https://b", body)])
+    assert [url for url, _ in sources] == ["https://a"]
+
+
+QUOTED_SECTION = (
+    "1011.5.2 Riser height and tread depth. Stair riser heights shall be 7 inches maximum and 4 inches minimum. "
+    "The riser height shall be measured vertically between the nosings of adjacent treads. Rectangular tread "
+    "depths shall be 11 inches minimum measured horizontally between the vertical planes of the foremost "
+    "projection of adjacent treads."
+)
+
+
+def test_headingless_page_splits_into_paragraphs():
+    text, _ = extract_text("<div><p>First paragraph.</p><p>Second paragraph.</p></div>")
+    assert split_sections(text) == ["First paragraph.", "Second paragraph."]
+
+
+def test_deduplicate_sources_drops_a_section_quoted_on_a_headingless_page():
+    code_text, _ = extract_text(f"<h2>Section 1011 Stairways</h2><p>{QUOTED_SECTION}</p>")
+    city_text, _ = extract_text(
+        "<div><p>The City of Antioch building division enforces the California Building Code for all new homes "
+        "and additions, and plan check staff review stair details as part of every residential permit.</p>"
+        f"<p>{QUOTED_SECTION}</p></div>"
+    )
+    sources = deduplicate_sources([("https://code", code_text), ("https://city", city_text)])
+    city = dict(sources)["https://city"]
+    assert "building division" in city
+    assert "Riser height" not in city
@@ -0,0 +1,114 @@
+import asyncio
+
+from src.content import ContentStore
+from src.fanout import FanOutController, covered_sections, domain_authority, rank_urls
+
+BODY = "The minimum clear width of stairways serving an occupant load of less than fifty shall be 36 inches."
+
+
+def page(store, url, *sections):
+    return store.add_text(url, "\n\n".join(f"## {ref} Stairways\n{BODY}" for ref in sections))
+
+
+def test_domain_authority_tiers():
+    assert domain_authority("https://library.municode.com/ca/antioch") == 4
+    assert domain_authority("https://www.antiochca.gov/building") == 3
+    assert domain_authority("https://www.ci.antioch.ca.us/building") == 3
+    assert domain_authority("https://www.cityofantioch.org/") == 3
+    assert domain_authority("https://www.builderblog.co.uk/stairs") == 1
+    assert domain_authority("https://www.co.nz.example.com/") == 1
+    assert domain_authority("https://www.reddit.com/r/homebuilding") == 0
+
+
+def test_rank_urls_orders_by_authority_and_keeps_search_order():
+    urls = [
+        "https://blog.example.com/a", "https://www.reddit.com/x", "https://www.antiochca.gov/b",
+        "https://blog.example.com/a", "https://up.codes/viewer/california", "https://www.ci.antioch.ca.us/c",
+    ]
+    assert rank_urls(urls) == [
+        "https://up.codes/viewer/california", "https://www.antiochca.gov/b", "https://www.ci.antioch.ca.us/c",
+        "https://blog.example.com/a", "https://www.reddit.com/x",
+    ]
+
+
+def test_covered_sections_counts_sections_with_relevant_text():
+    store = ContentStore()
+    content = page(store, "https://a", "Sec. 1011.2", "Section 1011.5", "§ 9-5.301")
+    assert covered_sections([content], "Find stairway requirements in Antioch") == {"1011.2", "1011.5", "9-5.301"}
+    assert covered_sections([content], "Find parking requirements in Antioch") == set()
+
+
+def test_covered_sections_ignores_tables_of_contents():
+    store = ContentStore()
+    toc = "\n".join(f"- Sec. 9-5.{300 + i} Stairways and fences" for i in range(9))
+    content = store.add_text("https://toc", "Title 9 Planning and Zoning\n" + toc)
+    assert covered_sections([content], "Find stairway requirements in Antioch") == set()
+
+
+class FakeTabs:
+    """`run_tab` stand-in: per-URL sections (None = the tab fails), tracking concurrency."""
+
+    def __init__(self, store, results, delay=0.01):
+        self.store = store
+        self.results = results
+        self.delay = delay
+        self.started = []
+        self.cancelled = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, url):
+        self.started.append(url)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay * (self.started.index(url) + 1))
+            sections = self.results[url]
+            if sections is None:
+                raise RuntimeError("tab failed")
+            return [page(self.store, url, *sections)] if sections else []
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+        finally:
+            self.running -= 1
+
+
+def run(controller, urls):
+    return asyncio.run(controller.run(urls))
+
+
+def test_fanout_cancels_remaining_tabs_once_covered():
+    store = ContentStore()
+    urls = [f"https://site{i}.gov/code" for i in range(5)]
+    tabs = FakeTabs(store, {
+        urls[0]: ["Sec. 101.1", "Sec. 101.2", "Sec. 101.3"], urls[1]: ["Sec. 101.4", "Sec. 101.5"],
+        urls[2]: ["Sec. 101.6"], urls[3]: ["Sec. 101.7"], urls[4]: ["Sec. 101.8"],
+    })
+    controller = FanOutController("Find stairway requirements", tabs, initial_tabs=2, max_concurrent=3, target_sections=5)
+    results = run(controller, urls)
+    # Not covered after the first tab: widened to 3 running, then covered after the second
+    assert [c.url for c in results] == urls[:2]
+    assert sorted(tabs.cancelled) == urls[2:4]
+    assert urls[4] not in tabs.started
+
+
+def test_fanout_replaces_failed_tabs():
+    store = ContentStore()
+    urls = [f"https://site{i}.gov/code" for i in range(3)]
+    tabs = FakeTabs(store, {urls[0]: None, urls[1]: [], urls[2]: ["Sec. 101.1"]})
+    controller = FanOutController("Find stairway requirements", tabs, initial_tabs=1, max_concurrent=1)
+    results = run(controller, urls)
+    assert tabs.started == urls
+    assert [c.url for c in results] == [urls[2]]
+    assert controller.failed == 2
+
+
+def test_fanout_respects_max_tabs_and_max_concurrent():
+    store = ContentStore()
+    urls = [f"https://site{i}.gov/code" for i in range(10)]
+    tabs = FakeTabs(store, {url: [] for url in urls})
+    controller = FanOutController("Find stairway requirements", tabs, initial_tabs=2, max_concurrent=3, max_tabs=5)
+    assert run(controller, urls) == []
+    assert len(tabs.started) == 5
+    assert tabs.max_running == 3
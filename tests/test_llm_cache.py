@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from src import llm_cache as llm_cache_module
+from src.llm_cache import CACHE_STORE, INDEX_KEY, LLMResponseCache, cache_key, distill_page_state
+
+
+@pytest.fixture
+def actor(fake_actor):
+    return fake_actor(llm_cache_module)
+
+
+def store_of(actor):
+    return actor.stores[CACHE_STORE]
+
+
+def test_cache_key_is_stable_and_sensitive_to_inputs():
+    messages = [{"role": "user", "content": "hi"}]
+    assert cache_key("m", 0.2, messages, page_state="p") == cache_key("m", 0.2, list(messages), page_state="p")
+    assert cache_key("m", 0.2, messages) != cache_key("m", 0.2, messages, response_format={"a": 1})
+
+
+def test_distill_page_state_ignores_per_load_noise():
+    first = '<div data-ts="1" nonce="abc"><script>var t=1</script>Stairs</div>'
+    second = '<div data-ts="2" nonce="xyz"><script>var t=2</script>Stairs</div>'
+    assert distill_page_state(first) == distill_page_state(second)
+
+
+def test_max_entries_bound_evicts_least_recently_used(actor):
+    async def run():
+        cache = LLMResponseCache(max_entries=3)
+        for key in "abcd":
+            await cache.put(key, {"v": key})
+        await cache.get("b")
+        await cache.put("e", {"v": "e"})
+        await cache.flush()
+        return cache
+
+    cache = asyncio.run(run())
+    records = store_of(actor).records
+    assert sorted(k for k in records if k != INDEX_KEY) == ["b", "d", "e"]
+    assert records[INDEX_KEY] == ["d", "b", "e"]
+    assert list(cache._index) == ["d", "b", "e"]
+
+
+def test_unindexed_records_are_adopted_as_least_recently_used(actor):
+    async def run():
+        store = await actor.open_key_value_store(name=CACHE_STORE)
+        for key in ("a", "orphan"):
+            await store.set_value(key, {"v": key})
+        # "orphan" was written by a run whose index was overwritten by this one
+        await store.set_value(INDEX_KEY, ["a"])
+        cache = LLMResponseCache(max_entries=2)
+        await cache._load()
+        loaded = list(cache._index)
+        await cache.put("c", {"v": "c"})
+        return loaded, cache, store
+
+    loaded, cache, store = asyncio.run(run())
+    assert loaded == ["orphan", "a"]
+    assert list(cache._index) == ["a", "c"]
+    assert "orphan" not in store.records
+
+
+def test_index_entries_without_record_are_dropped(actor):
+    async def run():
+        store = await actor.open_key_value_store(name=CACHE_STORE)
+        await store.set_value("a", {"v": "a"})
+        await store.set_value(INDEX_KEY, ["gone", "a"])
+        cache = LLMResponseCache()
+        assert await cache.get("gone") is None
+        await cache.flush()
+        return cache, store
+
+    cache, store = asyncio.run(run())
+    assert list(cache._index) == ["a"]
+    assert store.records[INDEX_KEY] == ["a"]
+
+
+def test_bypass_misses_but_still_stores(actor):
+    async def run():
+        cache = LLMResponseCache()
+        cache.bypass = True
+        await cache.put("k", {"v": 1})
+        return await cache.get("k")
+
+    assert asyncio.run(run()) is None
+    assert store_of(actor).records["k"] == {"v": 1}
+
+
+def test_without_persist_the_store_is_never_opened(actor):
+    async def run():
+        cache = LLMResponseCache(max_entries=1)
+        cache.persist = False
+        await cache.put("a", {"v": "a"})
+        await cache.put("b", {"v": "b"})
+        await cache.flush()
+        return await cache.get("a"), await cache.get("b")
+
+    assert asyncio.run(run()) == (None, {"v": "b"})
+    assert actor.stores == {}
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from src.jurisdictions.ncc import NCCClauseTree, NCCPart, NCCPlugin, NCCVolume
+
+
+@pytest.mark.parametrize("task", [
+    "NCC stair requirements for a house",
+    "Find balustrade requirements in Australia",
+    "what does h5d2 require",
+    "Class 1a dwelling balustrades in Brisbane",
+    "Deck rules in Sydney NSW",
+    "Perth, WA granny flat setbacks",
+])
+def test_matches_australian_tasks(task):
+    assert NCCPlugin().matches(task)
+
+
+@pytest.mark.parametrize("task", [
+    "Find ADU requirements in Brisbane, CA",
+    "Find stair requirements in Melbourne, FL",
+    "Fence height in Victoria, TX",
+    "Find single house building requirements in Antioch, CA.",
+])
+def test_does_not_match_us_tasks(task):
+    assert not NCCPlugin().matches(task)
+
+
+def test_resolve_lower_case_clause_id():
+    part = NCCPart(part_id="H5", title="Part H5 Safe movement and access", url="https://ncc.example/part-h5")
+    tree = NCCClauseTree(edition="ncc-2022", volumes=[
+        NCCVolume(key="volume-two", title="Volume Two", url="https://ncc.example/volume-two", parts=[part]),
+    ])
+    assert NCCPlugin().resolve(tree, "what does h5d2 require") == [(part, {"H5D2"})]
+
+
+def test_load_tree_recrawls_volumes_cached_without_parts(fake_actor):
+    from src.jurisdictions import ncc
+
+    actor = fake_actor(ncc)
+    crawled = []
+
+    async def crawl_volume(page, key):
+        crawled.append(key)
+        url = f"https://ncc.example/{key}"
+        return NCCVolume(key=key, title=key, url=url, parts=[NCCPart(part_id="H5", title="Part H5", url=url + "/h5")])
+
+    async def run():
+        store = await actor.open_key_value_store(name=ncc.CLAUSE_TREE_STORE)
+        cached = NCCClauseTree(edition=ncc.NCC_EDITION, volumes=[
+            NCCVolume(key="volume-one", title="Volume One", url="u1", parts=[NCCPart(part_id="C1", title="Part C1", url="u1/c1")]),
+            NCCVolume(key="volume-two", title="Volume Two", url="u2"),
+        ])
+        await store.set_value(ncc.NCC_EDITION, cached.model_dump())
+        plugin = NCCPlugin()
+        plugin._crawl_volume = crawl_volume
+        tree = await plugin.load_tree(page=None)
+        return tree, NCCClauseTree.model_validate(await store.get_value(ncc.NCC_EDITION))
+
+    tree, saved = asyncio.run(run())
+    assert crawled == ["volume-two", "volume-three", "housing-provisions"]
+    assert [v.key for v in tree.volumes] == list(ncc.NCC_VOLUMES)
+    assert all(v.parts for v in saved.volumes)
+    assert tree.volume("volume-one").parts[0].part_id == "C1"
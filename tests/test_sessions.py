@@ -0,0 +1,85 @@
+import asyncio
+import re
+import time
+
+import pytest
+
+from src import sessions
+from src.sessions import (
+    CONSENT_BUTTON_TEXT_RE, CONSENT_CONTAINER_RE, SESSION_COOKIE_TTL, _live_cookies, registrable_domain,
+)
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("https://library.municode.com/ca/antioch", "municode.com"),
+    ("ncc.abcb.gov.au", "abcb.gov.au"),
+    ("https://www.ci.antioch.ca.us/building", "ci.antioch.ca.us"),
+    ("co.contra-costa.ca.us", "co.contra-costa.ca.us"),
+    ("www.sfgov.ca.us", "sfgov.ca.us"),
+    ("http://127.0.0.1:8000/codes", "127.0.0.1"),
+    ("http://[::1]:8000/", "::1"),
+])
+def test_registrable_domain(host, expected):
+    assert registrable_domain(host) == expected
+
+
+def test_live_cookies_drops_expired_and_keeps_session_cookies():
+    cookies = [
+        {"name": "session", "expires": -1},
+        {"name": "fresh", "expires": time.time() + 3600},
+        {"name": "stale", "expires": time.time() - 3600},
+    ]
+    assert [c["name"] for c in _live_cookies(cookies)] == ["session", "fresh"]
+
+
+def test_live_cookies_drops_session_cookies_after_ttl():
+    cookies = [{"name": "old", "domain": "a.gov", "path": "/", "expires": -1}]
+    assert _live_cookies(cookies, {"old|a.gov|/": time.time() - SESSION_COOKIE_TTL - 1}) == []
+    assert _live_cookies(cookies, {"old|a.gov|/": time.time() - 60}) == cookies
+
+
+@pytest.mark.parametrize("container, matches", [
+    ("onetrust-banner-sdk cookie-consent", True),
+    ("gdpr-notice", True),
+    ("cmp", True),
+    ("banner cmp wrapper", True),
+    ("cmp-teaser cmp-container", False),
+    ("privacy-policy", False),
+])
+def test_consent_container_pattern(container, matches):
+    assert bool(re.search(CONSENT_CONTAINER_RE, container, re.IGNORECASE)) == matches
+
+
+@pytest.mark.parametrize("label, matches", [
+    ("Accept all cookies", True), ("I agree", True), ("Got it", True), ("Continue", False), ("OK", False),
+])
+def test_consent_button_text_pattern(label, matches):
+    assert bool(re.search(CONSENT_BUTTON_TEXT_RE, label, re.IGNORECASE)) == matches
+
+
+class FakeContext:
+    def __init__(self, state):
+        self.state = state
+
+    async def storage_state(self):
+        return self.state
+
+
+def test_save_keeps_only_the_tabs_domains(fake_actor):
+    actor = fake_actor(sessions)
+    cookie = {"name": "consent", "value": "yes", "domain": ".antiochca.gov", "path": "/", "expires": time.time() + 3600}
+    tracker = {"name": "_ga", "value": "1", "domain": ".tracker.example", "path": "/", "expires": time.time() + 3600}
+    context = FakeContext({
+        "cookies": [cookie, tracker],
+        "origins": [{"origin": "https://cdn.example", "localStorage": []}],
+    })
+
+    async def run():
+        store = sessions.DomainSessions()
+        await store.save(context, ["https://www.antiochca.gov/building", None])
+        return await store.storage_state("https://antiochca.gov/"), await store.storage_state("https://tracker.example/")
+
+    own, tracked = asyncio.run(run())
+    assert own == {"cookies": [cookie], "origins": []}
+    assert tracked is None
+    assert list(actor.stores[sessions.SESSION_STORE].records) == ["antiochca.gov"]